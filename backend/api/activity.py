@@ -0,0 +1,137 @@
+"""
+In-process coalescing of UserActivity writes.
+
+Almost every endpoint records activity for the requesting user, but only the
+first call per user and day changes anything. The recorder remembers which
+users it has already seen today and skips the database for repeat calls.
+
+With ``ACTIVITY_BUFFER_SIZE`` set above zero, new (user, day) pairs are also
+buffered and written in batches with ``bulk_create(ignore_conflicts=True)``
+once the buffer fills up or ``ACTIVITY_FLUSH_INTERVAL`` seconds have passed.
+"""
+import atexit
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .models import UserActivity, UserStats
+
+
+class ActivityRecorder:
+    def __init__(self, buffer_size=0, flush_interval=5.0):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._day = None
+        self._seen = set()
+        self._pending = set()
+        self._last_flush = time.monotonic()
+        if self.buffered:
+            atexit.register(self.flush)
+
+    @property
+    def buffered(self):
+        return self.buffer_size > 0
+
+    def _mark_seen(self, user, today):
+        """Returns (new, flush_due) for ``user`` today"""
+        with self._lock:
+            if today != self._day:
+                # Daily eviction; anything still pending belongs to the old day
+                self._day = today
+                self._seen.clear()
+            if user.pk in self._seen:
+                return False, False
+            self._seen.add(user.pk)
+            if not self.buffered:
+                return True, False
+            self._pending.add((user.pk, today))
+            due = (
+                len(self._pending) >= self.buffer_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            return True, due
+
+    def _forget(self, user):
+        with self._lock:
+            self._seen.discard(user.pk)
+
+    def record(self, user):
+        """Record activity for ``user`` today. Returns False for a repeat call."""
+        today = timezone.now().date()
+        new, due = self._mark_seen(user, today)
+        if not new:
+            return False
+
+        if self.buffered:
+            if due:
+                self.flush()
+            return True
+
+        try:
+            _, created = UserActivity.objects.get_or_create(user_id=user.pk, date=today)
+        except Exception:
+            self._forget(user)
+            raise
+        if created:
+            UserStats.record_active_days(today, [user.pk])
+        return True
+
+    async def arecord(self, user):
+        """Async ``record``; repeat calls never leave the event loop"""
+        today = timezone.now().date()
+        new, due = self._mark_seen(user, today)
+        if not new:
+            return False
+
+        if self.buffered:
+            if due:
+                await sync_to_async(self.flush)()
+            return True
+
+        try:
+            _, created = await UserActivity.objects.aget_or_create(user_id=user.pk, date=today)
+        except Exception:
+            self._forget(user)
+            raise
+        if created:
+            await sync_to_async(UserStats.record_active_days)(today, [user.pk])
+        return True
+
+    def flush(self):
+        """Write buffered activity rows and streak updates. Returns the number of pairs flushed."""
+        with self._lock:
+            batch, self._pending = self._pending, set()
+            self._last_flush = time.monotonic()
+        if not batch:
+            return 0
+
+        UserActivity.objects.bulk_create(
+            [UserActivity(user_id=user_id, date=day) for user_id, day in batch],
+            batch_size=max(self.buffer_size, 1),
+            ignore_conflicts=True
+        )
+
+        by_day = defaultdict(list)
+        for user_id, day in batch:
+            by_day[day].append(user_id)
+        for day in sorted(by_day):
+            UserStats.record_active_days(day, by_day[day])
+        return len(batch)
+
+    def reset(self):
+        """Forget everything seen and drop the buffer (used by tests between database resets)"""
+        with self._lock:
+            self._day = None
+            self._seen.clear()
+            self._pending.clear()
+
+
+activity_recorder = ActivityRecorder(
+    buffer_size=getattr(settings, 'ACTIVITY_BUFFER_SIZE', 0),
+    flush_interval=getattr(settings, 'ACTIVITY_FLUSH_INTERVAL', 5.0),
+)
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import SkillTemplate
 
 # Register your models here.
+@admin.register(SkillTemplate)
+class SkillTemplateAdmin(admin.ModelAdmin):
+    list_display = ('key', 'is_active', 'updated_at')
+    list_filter = ('is_active',)
+    search_fields = ('key',)
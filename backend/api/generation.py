@@ -0,0 +1,460 @@
+"""
+Materialization of generated learning paths.
+
+Both the Gemini branch and the template fallback of GenerateLearningPath
+describe a path as plain dicts. ``materialize_learning_path`` writes such a
+structure with one ``bulk_create`` per level inside a single transaction, so
+a failure leaves nothing behind. Lesson counts are computed up front,
+which makes the per-topic hooks in ``Topic.save()`` unnecessary
+(``bulk_create`` does not call them).
+
+The expected structure is::
+
+    [
+        {
+            "title": ..., "description": ...,
+            "topics": [
+                {
+                    "title": ..., "description": ..., "duration": ...,
+                    "quizzes": [
+                        {"title": ..., "description": ..., "duration": ...,
+                         "difficulty": ..., "questions_count": ...},
+                    ],
+                },
+            ],
+        },
+    ]
+
+``generate_path_content`` produces that structure, from the LLM provider when it answers
+with usable JSON and from built-in skill templates otherwise. Queued
+GenerationJobs are run by ``run_generation_job`` in the run_generation_worker
+command, which keeps the slow model call outside of the transaction. The
+synchronous endpoint instead streams the model output through
+``api.jsonstream`` and stores each journey as soon as it is complete
+(``stream_learning_path``).
+
+Parsed model answers are kept in the ``generation`` cache under a normalized
+request key (skills lowercased, sorted and de-duplicated, study hours bucketed
+by GENERATION_HOURS_BUCKET, weeks), so repeated requests skip the model call.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import LearningPath, LearningJourney, Topic, Quiz, PathRanking, Enrollment
+from .jsonstream import PathStreamParser, parse_path_stream
+from .llm import get_provider
+from .serializers import GeneratePathRequestSerializer
+from .skill_templates import skill_template_registry
+
+
+def build_path_prompt(selected_skills, study_hours, duration):
+    prompt = f"""
+    Create a detailed learning path for {', '.join(selected_skills)}. 
+    The user has {study_hours} hours per week to study and wants to complete it in {duration}.
+    
+    Format the response as a JSON object with the following structure:
+    {{
+        "path_title": "Title of the learning path",
+        "path_description": "Detailed description of the learning path",
+        "journeys": [
+            {{
+                "journey_title": "Title of journey 1",
+                "journey_description": "Description of journey 1",
+                "topics": [
+                    {{
+                        "topic_title": "Title of topic 1",
+                        "topic_description": "Description of topic 1",
+                        "topic_duration": "Duration in hours",
+                        "quizzes": [
+                            {{
+                                "quiz_title": "Title of quiz 1",
+                                "quiz_description": "Description of quiz 1",
+                                "quiz_duration": "Duration in minutes",
+                                "quiz_difficulty": "Beginner/Intermediate/Advanced",
+                                "questions_count": 10
+                            }}
+                        ]
+                    }}
+                ]
+            }}
+        ]
+    }}
+    
+    Make sure to create at least 2 journeys, each with 3-5 topics, and each topic with 1-2 quizzes.
+    """
+    return prompt
+
+
+def parse_model_response(response_text):
+    """Extract the path data from a model answer, with or without a fenced code block"""
+    return parse_path_stream([response_text])
+
+
+def build_fallback_journeys(selected_skills):
+    """Pick a template journey for every selected skill"""
+    return skill_template_registry.journeys_for(selected_skills)
+
+
+def path_weeks(target_date):
+    """Number of weeks until ``target_date``, at least one"""
+    today = datetime.now().date()
+    days_until_target = (target_date - today).days
+    return max(1, days_until_target // 7)
+
+
+def path_duration(target_date):
+    """Duration label for a path finishing on ``target_date``"""
+    return f"{path_weeks(target_date)} weeks"
+
+
+class GenerationCacheStats:
+    """Per-process hit/miss counters for the generation cache"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.model_seconds = 0.0
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self, seconds):
+        with self._lock:
+            self.misses += 1
+            self.model_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            average = self.model_seconds / self.misses if self.misses else 0.0
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'average_model_seconds': round(average, 3),
+                # Every hit skipped one model call of roughly average length
+                'estimated_seconds_saved': round(average * self.hits, 3),
+            }
+
+
+generation_cache_stats = GenerationCacheStats()
+
+
+def generation_cache_key(selected_skills, study_hours, weeks):
+    """Cache key shared by requests for the same skills, hours bucket and number of weeks"""
+    skills = sorted({skill.strip().lower() for skill in selected_skills})
+    hours_bucket = study_hours // max(1, getattr(settings, 'GENERATION_HOURS_BUCKET', 5))
+    digest = hashlib.sha1(json.dumps([skills, hours_bucket, weeks]).encode()).hexdigest()
+    return f'generation:{digest}'
+
+
+def _cached_model_data(selected_skills, study_hours, weeks):
+    key = generation_cache_key(selected_skills, study_hours, weeks)
+    data = caches['generation'].get(key)
+    if data is not None:
+        generation_cache_stats.record_hit()
+    return key, data
+
+
+def _path_provider():
+    provider = get_provider()
+    if provider is None:
+        raise Exception("No LLM provider configured, using fallback method")
+    return provider
+
+
+def _store_model_data(key, response_text, started):
+    data = parse_model_response(response_text)
+    generation_cache_stats.record_miss(time.monotonic() - started)
+    caches['generation'].set(key, data)
+    return data
+
+
+def generate_model_data(selected_skills, study_hours, weeks):
+    """Parsed model answer for a request, served from the generation cache when possible"""
+    key, data = _cached_model_data(selected_skills, study_hours, weeks)
+    if data is not None:
+        return data
+    provider = _path_provider()
+    started = time.monotonic()
+    response_text = provider.generate(build_path_prompt(selected_skills, study_hours, f"{weeks} weeks"))
+    return _store_model_data(key, response_text, started)
+
+
+async def agenerate_model_data(selected_skills, study_hours, weeks):
+    """Async ``generate_model_data``"""
+    key, data = _cached_model_data(selected_skills, study_hours, weeks)
+    if data is not None:
+        return data
+    provider = _path_provider()
+    started = time.monotonic()
+    response_text = await provider.agenerate(build_path_prompt(selected_skills, study_hours, f"{weeks} weeks"))
+    return _store_model_data(key, response_text, started)
+
+
+def _path_fields(data, selected_skills, duration):
+    return {
+        'title': data.get('path_title', f"Learning Path for {', '.join(selected_skills)}"),
+        'description': data.get('path_description', f"A personalized learning path to master {', '.join(selected_skills)}"),
+        'duration': duration,
+        'match_percentage': random.randint(85, 98),  # Random match percentage between 85-98%
+    }
+
+
+def _model_content(data, selected_skills, duration):
+    return dict(
+        _path_fields(data, selected_skills, duration),
+        journeys=normalize_generated_journeys(data, selected_skills)
+    )
+
+
+def _fallback_content(selected_skills, study_hours, duration):
+    return {
+        'title': f"Learning Path for {', '.join(selected_skills)}",
+        'description': f"A comprehensive learning path designed to help you master {', '.join(selected_skills)} in {duration}. This path is tailored to your schedule of {study_hours} hours per week.",
+        'duration': duration,
+        'match_percentage': random.randint(85, 98),
+        'journeys': build_fallback_journeys(selected_skills),
+    }
+
+
+def generate_path_content(target_date, study_hours, selected_skills):
+    """
+    Build the keyword arguments for ``materialize_learning_path`` (without the user).
+    Uses the LLM provider (or its cached answer) when available and falls back to the skill
+    templates on any error.
+    """
+    weeks = path_weeks(target_date)
+    duration = f"{weeks} weeks"
+    try:
+        data = generate_model_data(selected_skills, study_hours, weeks)
+        return _model_content(data, selected_skills, duration)
+    except Exception as e:
+        print(f"Error using LLM provider or parsing response: {str(e)}")
+    return _fallback_content(selected_skills, study_hours, duration)
+
+
+async def agenerate_path_content(target_date, study_hours, selected_skills):
+    """Async ``generate_path_content``; the model call does not hold a thread"""
+    weeks = path_weeks(target_date)
+    duration = f"{weeks} weeks"
+    try:
+        data = await agenerate_model_data(selected_skills, study_hours, weeks)
+        return _model_content(data, selected_skills, duration)
+    except Exception as e:
+        print(f"Error using LLM provider or parsing response: {str(e)}")
+    return _fallback_content(selected_skills, study_hours, duration)
+
+
+def stream_learning_path(user, provider, selected_skills, study_hours, weeks):
+    """
+    Store a path for ``user`` while the model streams it: each journey is saved
+    as soon as its JSON object is complete, so the inserts overlap with
+    generation. If the stream breaks off, the journeys received so far are
+    kept. Returns the path, or None if not a single journey arrived.
+    """
+    cache_key = generation_cache_key(selected_skills, study_hours, weeks)
+    duration = f"{weeks} weeks"
+    parser = PathStreamParser()
+    data = {'journeys': []}
+    learning_path = None
+    started = time.monotonic()
+    chunks = provider.stream(build_path_prompt(selected_skills, study_hours, duration))
+    try:
+        for chunk in chunks:
+            for event in parser.feed(chunk):
+                if event[0] == 'field':
+                    data[event[1]] = event[2]
+                if event[0] != 'journey':
+                    continue
+                index = len(data['journeys'])
+                data['journeys'].append(event[2])
+                journeys = normalize_generated_journeys({'journeys': [event[2]]}, selected_skills, start=index)
+                if learning_path is None:
+                    # The path only exists once its first journey is stored
+                    with transaction.atomic():
+                        path = LearningPath.objects.create(**_path_fields(data, selected_skills, duration))
+                        add_journeys(path, user, journeys)
+                    learning_path = path
+                else:
+                    add_journeys(learning_path, user, journeys, enroll=False)
+    except Exception as e:
+        print(f"Model stream ended early after {len(data['journeys'])} journeys: {str(e)}")
+    finally:
+        chunks.close()
+
+    if parser.complete and data['journeys']:
+        generation_cache_stats.record_miss(time.monotonic() - started)
+        caches['generation'].set(cache_key, data)
+    return learning_path
+
+
+def generate_learning_path(user, target_date, study_hours, selected_skills):
+    """Generate and store a learning path for ``user``, returning it"""
+    weeks = path_weeks(target_date)
+    _, data = _cached_model_data(selected_skills, study_hours, weeks)
+    provider = get_provider()
+    if data is None and provider is not None:
+        learning_path = stream_learning_path(user, provider, selected_skills, study_hours, weeks)
+        if learning_path is not None:
+            return learning_path
+        content = _fallback_content(selected_skills, study_hours, f"{weeks} weeks")
+    elif data is not None:
+        content = _model_content(data, selected_skills, f"{weeks} weeks")
+        return _materialize_or_fallback(user, content, selected_skills, study_hours, weeks)
+    else:
+        content = _fallback_content(selected_skills, study_hours, f"{weeks} weeks")
+    return materialize_learning_path(user=user, **content)
+
+
+async def agenerate_learning_path(user, target_date, study_hours, selected_skills):
+    """Async ``generate_learning_path``. The inserts run in one transaction on a sync thread."""
+    content = await agenerate_path_content(target_date, study_hours, selected_skills)
+    return await sync_to_async(_materialize_or_fallback)(
+        user, content, selected_skills, study_hours, path_weeks(target_date)
+    )
+
+
+def _materialize_or_fallback(user, content, selected_skills, study_hours, weeks):
+    """
+    Store model content, or the template content if the model's answer cannot
+    be stored. An unstorable answer is dropped from the generation cache so
+    later requests ask the model again.
+    """
+    try:
+        return materialize_learning_path(user=user, **content)
+    except Exception as e:
+        print(f"Error storing the generated learning path: {str(e)}")
+    caches['generation'].delete(generation_cache_key(selected_skills, study_hours, weeks))
+    return materialize_learning_path(user=user, **_fallback_content(selected_skills, study_hours, f"{weeks} weeks"))
+
+
+def normalize_generated_journeys(data, selected_skills, start=0):
+    """Convert Gemini's ``journey_title``/``topic_title``/... keys into the materializer structure"""
+    skill = selected_skills[0]
+    journeys = []
+    for i, journey_data in enumerate(data.get('journeys', []), start):
+        topics = []
+        for j, topic_data in enumerate(journey_data.get('topics', [])):
+            quizzes = []
+            for k, quiz_data in enumerate(topic_data.get('quizzes', [])):
+                quizzes.append({
+                    "title": quiz_data.get('quiz_title', f"Quiz {k+1}: {skill} Assessment"),
+                    "description": quiz_data.get('quiz_description', f"Test your knowledge of {skill}"),
+                    "duration": quiz_data.get('quiz_duration', "30 minutes"),
+                    "difficulty": quiz_data.get('quiz_difficulty', "Beginner"),
+                    "questions_count": quiz_data.get('questions_count', 10),
+                })
+            topics.append({
+                "title": topic_data.get('topic_title', f"Topic {j+1}: {skill} Basics"),
+                "description": topic_data.get('topic_description', f"Learn the fundamentals of {skill}"),
+                "duration": topic_data.get('topic_duration', "2 hours"),
+                "quizzes": quizzes,
+            })
+        journeys.append({
+            "title": journey_data.get('journey_title', f"Journey {i+1}: {skill} Mastery"),
+            "description": journey_data.get('journey_description', f"Master the fundamentals of {skill}"),
+            "topics": topics,
+        })
+    return journeys
+
+
+@transaction.atomic
+def materialize_learning_path(user, title, description, duration, match_percentage, journeys):
+    """Create a learning path with all its journeys, topics and quizzes and return it"""
+    learning_path = LearningPath.objects.create(
+        title=title,
+        description=description,
+        duration=duration,
+        match_percentage=match_percentage
+    )
+    add_journeys(learning_path, user, journeys)
+    return learning_path
+
+
+@transaction.atomic
+def add_journeys(learning_path, user, journeys, enroll=True):
+    """
+    Add journeys with their topics and quizzes to a path, created by
+    ``user``. With ``enroll`` the user is also enrolled in the path.
+    """
+    journey_objs = LearningJourney.objects.bulk_create([
+        LearningJourney(
+            title=journey_data["title"],
+            description=journey_data["description"],
+            learning_path=learning_path,
+            user=user,
+            total_lessons=len(journey_data["topics"])
+        )
+        for journey_data in journeys
+    ])
+
+    topic_objs = Topic.objects.bulk_create([
+        Topic(
+            title=topic_data["title"],
+            description=topic_data["description"],
+            learning_journey=journey,
+            order=i+1,
+            duration=topic_data["duration"]
+        )
+        for journey, journey_data in zip(journey_objs, journeys)
+        for i, topic_data in enumerate(journey_data["topics"])
+    ])
+
+    topics_data = [topic_data for journey_data in journeys for topic_data in journey_data["topics"]]
+    Quiz.objects.bulk_create([
+        Quiz(
+            title=quiz_data["title"],
+            description=quiz_data["description"],
+            topic=topic,
+            duration=quiz_data["duration"],
+            difficulty=quiz_data["difficulty"],
+            questions_count=quiz_data["questions_count"]
+        )
+        for topic, topic_data in zip(topic_objs, topics_data)
+        for quiz_data in topic_data["quizzes"]
+    ])
+
+    # bulk_create skips the ranking signals, so account for the new rows once
+    PathRanking.apply_delta(learning_path.pk, total_lessons=len(topic_objs))
+    if enroll and user is not None and journey_objs:
+        Enrollment.enroll(user, learning_path.pk)
+    # ...and the tree signals, so trees cached while the path streams in go stale
+    LearningPath.bump_tree_version(pk=learning_path.pk)
+
+
+def run_generation_job(job):
+    """Run a claimed GenerationJob. Returns True if its outcome was recorded."""
+    serializer = GeneratePathRequestSerializer(data=job.params)
+    if not serializer.is_valid():
+        return job.finish(status=job.FAILED, error=json.dumps(serializer.errors))
+
+    params = serializer.validated_data
+    try:
+        content = generate_path_content(**params)
+        with transaction.atomic():
+            # Same template fallback as the views, so a bad answer does not burn every attempt
+            learning_path = _materialize_or_fallback(
+                job.user, content, params['selected_skills'], params['study_hours'], path_weeks(params['target_date'])
+            )
+            if not job.succeed(learning_path):
+                # The lease expired and another worker owns the job now
+                transaction.set_rollback(True)
+                return False
+    except Exception as e:
+        print(f"Generation job {job.pk} failed: {str(e)}")
+        return job.fail(str(e))
+    return True
@@ -0,0 +1,149 @@
+"""
+Incremental parser for the learning path JSON produced by the model.
+
+The model answers with a JSON object, often wrapped in a Markdown code fence
+or surrounded by prose. ``PathStreamParser`` is fed the text as it arrives,
+skips everything before the first ``{`` and tracks strings, escapes and
+nesting so it can hand out every complete value it cares about as soon as
+its closing brace arrives:
+
+* ``('field', key, value)`` for the root ``path_title`` and ``path_description``
+* ``('topic', journey_index, topic)`` for each object in a journey's ``topics``
+* ``('journey', journey_index, journey)`` for each object in ``journeys``
+
+Each object is decoded on its own with ``json.loads(strict=False)``, which
+accepts the raw newlines models like to put inside strings. A malformed or
+truncated tail only loses the objects that never completed.
+"""
+import json
+
+WATCHED_FIELDS = ('path_title', 'path_description')
+
+
+class _Container:
+    __slots__ = ('kind', 'key', 'start', 'expect_key', 'count')
+
+    def __init__(self, kind, key, start):
+        self.kind = kind
+        self.key = key  # Key this container is stored under in its parent object
+        self.start = start
+        self.expect_key = kind == '{'
+        self.count = 0  # Completed items, for arrays
+
+
+class PathStreamParser:
+    def __init__(self):
+        self.buffer = ''
+        self.pos = 0
+        self.stack = []
+        self.started = False
+        self.complete = False
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.pending_key = None
+        self.errors = 0
+
+    def feed(self, text):
+        """Consume a chunk of model output and return the events it completed"""
+        self.buffer += text
+        events = []
+        buffer = self.buffer
+        while self.pos < len(buffer) and not self.complete:
+            char = buffer[self.pos]
+            if not self.started:
+                if char == '{':
+                    self.started = True
+                    self.stack.append(_Container('{', None, self.pos))
+                self.pos += 1
+                continue
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    self._string_done(self.string_start, self.pos + 1, events)
+                self.pos += 1
+                continue
+
+            top = self.stack[-1]
+            if char == '"':
+                self.in_string = True
+                self.string_start = self.pos
+            elif char in '{[':
+                key = self.pending_key if top.kind == '{' else None
+                self.stack.append(_Container(char, key, self.pos))
+            elif char in '}]':
+                closed = self.stack.pop()
+                if not self.stack:
+                    self.complete = True
+                else:
+                    self._container_done(closed, self.pos + 1, events)
+            elif char == ',':
+                if top.kind == '{':
+                    top.expect_key = True
+            elif char == ':':
+                top.expect_key = False
+            self.pos += 1
+        return events
+
+    def _string_done(self, start, end, events):
+        top = self.stack[-1]
+        if top.kind == '{' and top.expect_key:
+            self.pending_key = self._decode(start, end)
+            return
+        if top.kind == '[':
+            top.count += 1
+        elif len(self.stack) == 1 and self.pending_key in WATCHED_FIELDS:
+            value = self._decode(start, end)
+            if value is not None:
+                events.append(('field', self.pending_key, value))
+
+    def _container_done(self, closed, end, events):
+        parent = self.stack[-1]
+        if parent.kind == '[':
+            parent.count += 1
+        if closed.kind != '{' or parent.kind != '[':
+            return
+        depth = len(self.stack)
+        index = parent.count - 1
+        if depth == 2 and parent.key == 'journeys':
+            # root { -> journeys [ -> journey {
+            kind, args = 'journey', (index,)
+        elif depth == 4 and parent.key == 'topics' and self.stack[1].key == 'journeys':
+            # ... journey { -> topics [ -> topic {
+            kind, args = 'topic', (self.stack[1].count, index)
+        else:
+            return
+        value = self._decode(closed.start, end)
+        if isinstance(value, dict):
+            events.append((kind, *args, value))
+
+    def _decode(self, start, end):
+        try:
+            return json.loads(self.buffer[start:end], strict=False)
+        except ValueError:
+            self.errors += 1
+            return None
+
+
+def parse_path_stream(chunks):
+    """
+    Parse model output chunks into ``{'path_title': ..., 'path_description': ...,
+    'journeys': [...]}`` keeping every complete journey. Raises ValueError when
+    no journey could be recovered.
+    """
+    parser = PathStreamParser()
+    data = {'journeys': []}
+    for chunk in chunks:
+        for event in parser.feed(chunk):
+            if event[0] == 'field':
+                data[event[1]] = event[2]
+            elif event[0] == 'journey':
+                data['journeys'].append(event[2])
+    if not data['journeys']:
+        raise ValueError("No complete journey in the model response")
+    return data
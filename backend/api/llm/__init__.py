@@ -0,0 +1,82 @@
+"""
+Model providers for the AI features.
+
+``get_provider()`` returns the process-wide provider configured by the
+LLM_PROVIDER setting, or None when no model is configured. Providers keep
+their client between requests, give every call a deadline and stop calling a
+failing backend for a while (circuit breaker), so callers drop to their
+template answers quickly during an outage instead of piling up.
+
+    LLM_PROVIDER = {
+        'BACKEND': 'gemini',  # or 'fake' for offline tests and load tests
+        'API_KEY': ...,
+        'MODEL': 'gemini-1.5-flash',
+        'TIMEOUT': 20,
+        'FAILURE_THRESHOLD': 5,
+        'RESET_TIMEOUT': 30,
+        # fake only
+        'LATENCY': 0.0, 'JITTER': 0.0, 'FAILURE_RATE': 0.0, 'CHUNK_INTERVAL': 0.0, 'SEED': None,
+    }
+"""
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .base import CircuitBreaker, CircuitOpen, LLMError, LLMProvider, LLMTimeout
+
+_provider = None
+_provider_loaded = False
+_lock = threading.Lock()
+
+
+def build_provider(config):
+    """Create a provider from an LLM_PROVIDER style dict"""
+    options = {
+        'timeout': config.get('TIMEOUT', 20.0),
+        'failure_threshold': config.get('FAILURE_THRESHOLD', 5),
+        'reset_timeout': config.get('RESET_TIMEOUT', 30.0),
+    }
+    backend = config.get('BACKEND', 'gemini')
+    if backend == 'fake':
+        from .fake import FakeProvider
+        return FakeProvider(
+            latency=config.get('LATENCY', 0.0),
+            jitter=config.get('JITTER', 0.0),
+            failure_rate=config.get('FAILURE_RATE', 0.0),
+            chunk_interval=config.get('CHUNK_INTERVAL', 0.0),
+            seed=config.get('SEED'),
+            **options
+        )
+    if backend == 'gemini':
+        if not config.get('API_KEY'):
+            return None
+        from .gemini import GeminiProvider
+        return GeminiProvider(config['API_KEY'], model=config.get('MODEL', 'gemini-1.5-flash'), **options)
+    raise ValueError(f"Unknown LLM backend: {backend}")
+
+
+def get_provider():
+    """The configured provider for this process, or None"""
+    global _provider, _provider_loaded
+    if not _provider_loaded:
+        with _lock:
+            if not _provider_loaded:
+                _provider = build_provider(getattr(settings, 'LLM_PROVIDER', {}))
+                _provider_loaded = True
+    return _provider
+
+
+def reset_provider():
+    """Drop the cached provider so the next call rebuilds it from settings"""
+    global _provider, _provider_loaded
+    with _lock:
+        _provider = None
+        _provider_loaded = False
+
+
+@receiver(setting_changed)
+def llm_setting_changed(setting, **kwargs):
+    if setting == 'LLM_PROVIDER':
+        reset_provider()
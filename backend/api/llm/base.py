@@ -0,0 +1,206 @@
+import asyncio
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+
+
+class LLMError(Exception):
+    """A model call failed; callers fall back to their template answers"""
+
+
+class LLMTimeout(LLMError):
+    """A model call did not finish within its deadline"""
+
+
+class CircuitOpen(LLMError):
+    """The provider failed too often recently and calls are short-circuited"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failures in a row the circuit opens and calls
+    fail immediately for ``reset_timeout`` seconds. Then a single trial call is
+    let through (half-open): success closes the circuit, failure opens it again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go through now"""
+        with self._lock:
+            state = self._state()
+            if state == self.OPEN or (state == self.HALF_OPEN and self._trial_running):
+                raise CircuitOpen("LLM provider is unavailable, failing fast")
+            if state == self.HALF_OPEN:
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def record_abort(self):
+        """A call was abandoned before it had an outcome; free the trial slot"""
+        with self._lock:
+            self._trial_running = False
+
+
+class LLMProvider:
+    """
+    A long-lived model client. Subclasses implement ``_generate``; ``generate``
+    adds the per-call deadline and the circuit breaker around it.
+    """
+    name = 'base'
+
+    def __init__(self, timeout=20.0, failure_threshold=5, reset_timeout=30.0):
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+    def generate(self, prompt, timeout=None):
+        """Return the model's text answer for ``prompt``. Raises LLMError."""
+        self.breaker.before_call()
+        try:
+            text = self._generate(prompt, timeout or self.timeout)
+        except LLMError:
+            self.breaker.record_failure()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            raise LLMError(str(e)) from e
+        self.breaker.record_success()
+        return text
+
+    def stream(self, prompt, timeout=None):
+        """
+        Yield the answer for ``prompt`` in chunks as the model produces them.
+        Raises LLMError. Closing the generator early closes the upstream stream.
+        """
+        self.breaker.before_call()
+        chunks = self._stream(prompt, timeout or self.timeout)
+        try:
+            yield from chunks
+        except LLMError:
+            self.breaker.record_failure()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            raise LLMError(str(e)) from e
+        except BaseException:
+            # Closed early (the client went away) or cancelled
+            self.breaker.record_abort()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            chunks.close()
+
+    async def agenerate(self, prompt, timeout=None):
+        """Async ``generate``: waits on the model without holding a thread. Raises LLMError."""
+        self.breaker.before_call()
+        timeout = timeout or self.timeout
+        try:
+            text = await asyncio.wait_for(self._agenerate(prompt, timeout), timeout)
+        except asyncio.TimeoutError as e:
+            self.breaker.record_failure()
+            raise LLMTimeout(f"No answer from the model within {timeout}s") from e
+        except LLMError:
+            self.breaker.record_failure()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            raise LLMError(str(e)) from e
+        except BaseException:
+            # Cancelled, e.g. when the client disconnects from an async view
+            self.breaker.record_abort()
+            raise
+        self.breaker.record_success()
+        return text
+
+    async def astream(self, prompt, timeout=None):
+        """
+        Yield the answer for ``prompt`` in chunks as the model produces them.
+        ``timeout`` bounds the wait for each chunk. Raises LLMError.
+        Closing the generator early closes the upstream stream as well.
+        """
+        self.breaker.before_call()
+        timeout = timeout or self.timeout
+        chunks = self._astream(prompt, timeout)
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError as e:
+                    raise LLMTimeout(f"No output from the model within {timeout}s") from e
+                yield chunk
+        except LLMError:
+            self.breaker.record_failure()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            raise LLMError(str(e)) from e
+        except BaseException:
+            # Closed early (the client went away) or cancelled
+            self.breaker.record_abort()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            await chunks.aclose()
+
+    def _generate(self, prompt, timeout):
+        raise NotImplementedError
+
+    async def _agenerate(self, prompt, timeout):
+        """Async model call; by default ``_generate`` in a worker thread"""
+        return await sync_to_async(self._generate, thread_sensitive=False)(prompt, timeout)
+
+    def _stream(self, prompt, timeout):
+        """Blocking chunk iterator; by default the whole answer as one chunk"""
+        yield self._generate(prompt, timeout)
+
+    async def _astream(self, prompt, timeout):
+        """Async chunk iterator; by default ``_stream`` driven from a worker thread"""
+        chunks = self._stream(prompt, timeout)
+        next_chunk = sync_to_async(next, thread_sensitive=False)
+        try:
+            while True:
+                chunk = await next_chunk(chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            chunks.close()
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import random
+import threading
+import time
+
+from .base import LLMError, LLMProvider, LLMTimeout
+
+
+class FakeProvider(LLMProvider):
+    """
+    Offline stand-in for a real model, for tests and load tests.
+
+    Answers learning path prompts with a small fixed path and anything else
+    with a short tutor reply, after ``latency`` seconds (plus up to ``jitter``).
+    A ``failure_rate`` share of calls raise LLMError; calls slower than their
+    deadline raise LLMTimeout once the deadline has passed. Streamed answers
+    arrive ``chunk_words`` words at a time, every ``chunk_interval`` seconds.
+    """
+    name = 'fake'
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, chunk_interval=0.0, chunk_words=5, seed=None, **options):
+        super().__init__(**options)
+        self.chunk_interval = chunk_interval
+        self.chunk_words = chunk_words
+        self.open_streams = 0
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _next_call(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.failure_rate
+        return delay, failed
+
+    def _answer(self, prompt):
+        if '"path_title"' in prompt:
+            return json.dumps(self.learning_path())
+        return "This is a practice answer from the offline tutor. Break the concept into small steps and try an example."
+
+    def _generate(self, prompt, timeout):
+        delay, failed = self._next_call()
+        if delay > timeout:
+            time.sleep(timeout)
+            raise LLMTimeout(f"Fake provider took longer than {timeout}s")
+        time.sleep(delay)
+        if failed:
+            raise LLMError("Fake provider failure")
+        return self._answer(prompt)
+
+    def _stream(self, prompt, timeout):
+        delay, failed = self._next_call()
+        if delay > timeout:
+            time.sleep(timeout)
+            raise LLMTimeout(f"Fake provider took longer than {timeout}s")
+        time.sleep(delay)
+        if failed:
+            raise LLMError("Fake provider failure")
+        for i, chunk in enumerate(self._chunks(prompt)):
+            if i:
+                time.sleep(self.chunk_interval)
+            yield chunk
+
+    def _chunks(self, prompt):
+        words = self._answer(prompt).split(' ')
+        for start in range(0, len(words), self.chunk_words):
+            yield ' '.join(words[start:start + self.chunk_words]) + ' '
+
+    async def _agenerate(self, prompt, timeout):
+        delay, failed = self._next_call()
+        await asyncio.sleep(delay)
+        if failed:
+            raise LLMError("Fake provider failure")
+        return self._answer(prompt)
+
+    async def _astream(self, prompt, timeout):
+        # Native async so load tests do not need a thread per open stream
+        delay, failed = self._next_call()
+        self.open_streams += 1
+        try:
+            await asyncio.sleep(delay)
+            if failed:
+                raise LLMError("Fake provider failure")
+            for i, chunk in enumerate(self._chunks(prompt)):
+                if i:
+                    await asyncio.sleep(self.chunk_interval)
+                yield chunk
+        finally:
+            self.open_streams -= 1
+
+    def learning_path(self):
+        return {
+            "path_title": "Fake path",
+            "path_description": "Generated offline",
+            "journeys": [
+                {
+                    "journey_title": f"Fake journey {i+1}",
+                    "journey_description": "Generated offline",
+                    "topics": [
+                        {
+                            "topic_title": f"Fake topic {j+1}",
+                            "topic_description": "Generated offline",
+                            "topic_duration": "2 hours",
+                            "quizzes": [{"quiz_title": f"Fake quiz {j+1}"}],
+                        }
+                        for j in range(3)
+                    ],
+                }
+                for i in range(2)
+            ],
+        }
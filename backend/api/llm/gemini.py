@@ -0,0 +1,49 @@
+import threading
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from .base import LLMProvider, LLMTimeout
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini through google-generativeai, configured once per process"""
+    name = 'gemini'
+
+    def __init__(self, api_key, model='gemini-1.5-flash', **options):
+        super().__init__(**options)
+        self.api_key = api_key
+        self.model_name = model
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def _generate(self, prompt, timeout):
+        try:
+            response = self.model.generate_content(prompt, request_options={'timeout': timeout})
+        except google_exceptions.DeadlineExceeded as e:
+            raise LLMTimeout(str(e)) from e
+        return response.text
+
+    async def _agenerate(self, prompt, timeout):
+        try:
+            response = await self.model.generate_content_async(prompt, request_options={'timeout': timeout})
+        except google_exceptions.DeadlineExceeded as e:
+            raise LLMTimeout(str(e)) from e
+        return response.text
+
+    def _stream(self, prompt, timeout):
+        try:
+            response = self.model.generate_content(prompt, stream=True, request_options={'timeout': timeout})
+            for chunk in response:
+                yield chunk.text
+        except google_exceptions.DeadlineExceeded as e:
+            raise LLMTimeout(str(e)) from e
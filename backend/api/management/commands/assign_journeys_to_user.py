@@ -1,34 +1,148 @@
-from django.core.management.base import BaseCommand
+import csv
+import time
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
-from api.models import LearningJourney
+from django.db import transaction
+from django.db.models import Case, Value, When
+from api.models import LearningJourney, Enrollment
 
 class Command(BaseCommand):
-    help = 'Assigns existing learning journeys to a specific user'
+    help = 'Assigns unassigned learning journeys to a user, or spreads them across many users, and enrolls them in the paths'
 
     def add_arguments(self, parser):
-        parser.add_argument('username', type=str, help='Username to assign journeys to')
+        parser.add_argument('username', nargs='?', help='Username to assign journeys to')
+        parser.add_argument('--users', help='Comma-separated usernames to spread the journeys across')
+        parser.add_argument('--users-file', help='CSV of username[,cohort] rows to spread the journeys across')
+        parser.add_argument(
+            '--strategy', choices=['round-robin', 'cohort'], default='round-robin',
+            help='round-robin deals journeys to the users in turn; cohort keeps each path within one cohort'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Journeys per UPDATE')
+        parser.add_argument('--dry-run', action='store_true', help='Report the assignment without writing it')
 
     def handle(self, *args, **options):
-        username = options['username']
-        
-        try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f'User {username} does not exist'))
-            return
-        
+        cohorts = self.load_cohorts(options)
+        users = [user_id for members in cohorts.values() for user_id in members]
+        if options['strategy'] == 'cohort':
+            assigner = CohortAssigner(cohorts)
+        else:
+            assigner = RoundRobinAssigner(users)
+
         # Get all journeys that don't have a user assigned
         journeys = LearningJourney.objects.filter(user__isnull=True)
-        
+
         if not journeys.exists():
             self.stdout.write(self.style.WARNING('No unassigned journeys found'))
             return
-        
-        # Assign the user to each journey
-        count = 0
-        for journey in journeys:
-            journey.user = user
-            journey.save()
-            count += 1
-        
-        self.stdout.write(self.style.SUCCESS(f'Successfully assigned {count} journeys to user {username}'))
+
+        total = journeys.count()
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        per_user = Counter()
+        start = time.perf_counter()
+
+        # Walk the journeys in id ranges, one set-based UPDATE per chunk
+        count = chunks = 0
+        last_id = 0
+        while True:
+            rows = list(
+                journeys.filter(id__gt=last_id).order_by('id').values_list('id', 'learning_path_id')[:chunk_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            assignment = defaultdict(list)
+            enrollments = defaultdict(set)
+            for journey_id, path_id in rows:
+                user_id = assigner.assign(path_id)
+                assignment[user_id].append(journey_id)
+                enrollments[path_id].add(user_id)
+                per_user[user_id] += 1
+
+            if not dry_run:
+                with transaction.atomic():
+                    chunk = journeys.filter(id__gte=rows[0][0], id__lte=last_id)
+                    if len(assignment) == 1:
+                        chunk.update(user_id=next(iter(assignment)))
+                    else:
+                        chunk.update(user_id=Case(*[
+                            When(pk__in=journey_ids, then=Value(user_id))
+                            for user_id, journey_ids in assignment.items()
+                        ]))
+                    # Progress is tracked per enrollment, so enroll the users in the paths
+                    for path_id, user_ids in enrollments.items():
+                        Enrollment.enroll_users(path_id, sorted(user_ids))
+
+            count += len(rows)
+            chunks += 1
+            self.stdout.write(f'Chunk {chunks}: {count}/{total} journeys')
+
+        elapsed = time.perf_counter() - start
+        usernames = dict(User.objects.filter(pk__in=per_user).values_list('id', 'username'))
+        for user_id, assigned in per_user.most_common(10):
+            self.stdout.write(f'  {usernames[user_id]}: {assigned} journeys')
+        if len(per_user) > 10:
+            self.stdout.write(f'  ... and {len(per_user) - 10} more users')
+
+        rate = count / elapsed if elapsed else 0
+        timing = f'in {elapsed:.2f}s ({chunks} chunks, {rate:.0f} journeys/s)'
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'Dry run: would assign {count} journeys to {len(per_user)} users {timing}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Successfully assigned {count} journeys to {len(per_user)} users {timing}'))
+
+    def load_cohorts(self, options):
+        """Ordered ``{cohort: [user id, ...]}`` of the users to assign journeys to"""
+        rows = []
+        if options['username']:
+            rows.append((options['username'], ''))
+        if options['users']:
+            rows.extend((name.strip(), '') for name in options['users'].split(',') if name.strip())
+        if options['users_file']:
+            with open(options['users_file'], newline='') as f:
+                for row in csv.reader(f):
+                    if row and row[0].strip():
+                        rows.append((row[0].strip(), row[1].strip() if len(row) > 1 else ''))
+        if not rows:
+            raise CommandError('Pass a username, --users or --users-file')
+
+        ids = dict(User.objects.filter(username__in=[name for name, cohort in rows]).values_list('username', 'id'))
+        missing = [name for name, cohort in rows if name not in ids]
+        if missing:
+            raise CommandError(f'User {missing[0]} does not exist' if len(missing) == 1 else f'Users do not exist: {", ".join(missing)}')
+
+        cohorts = defaultdict(list)
+        for name, cohort in rows:
+            if ids[name] not in cohorts[cohort]:
+                cohorts[cohort].append(ids[name])
+        return cohorts
+
+class RoundRobinAssigner:
+    """Deals journeys to the users in turn"""
+
+    def __init__(self, users):
+        self.users = users
+        self.position = 0
+
+    def assign(self, path_id):
+        user_id = self.users[self.position % len(self.users)]
+        self.position += 1
+        return user_id
+
+class CohortAssigner:
+    """
+    Deals learning paths to cohorts in turn, and each path's journeys to the
+    members of its cohort in turn, so a path stays within one cohort
+    """
+
+    def __init__(self, cohorts):
+        self.cohorts = [RoundRobinAssigner(members) for members in cohorts.values()]
+        self.path_cohorts = {}
+
+    def assign(self, path_id):
+        if path_id not in self.path_cohorts:
+            self.path_cohorts[path_id] = self.cohorts[len(self.path_cohorts) % len(self.cohorts)]
+        return self.path_cohorts[path_id].assign(path_id)
@@ -0,0 +1,53 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from api.models import UserActivity, UserStats
+
+class Command(BaseCommand):
+    help = 'Rebuilds materialized streak state on UserStats from UserActivity rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk write')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        
+        # Walk every activity once, ordered so each user's days are contiguous
+        streaks = {}
+        activities = UserActivity.objects.order_by('user_id', 'date').values_list('user_id', 'date')
+        for user_id, day in activities.iterator(chunk_size=batch_size):
+            state = streaks.get(user_id)
+            if state is None:
+                streaks[user_id] = [1, 1, day]
+                continue
+            current, longest, last_day = state
+            if day - last_day == timedelta(days=1):
+                current += 1
+            elif day != last_day:
+                current = 1
+            streaks[user_id] = [current, max(longest, current), day]
+        
+        existing = UserStats.objects.in_bulk(streaks, field_name='user_id')
+        to_update = []
+        to_create = []
+        for user_id, (current, longest, last_day) in streaks.items():
+            stats = existing.get(user_id) or UserStats(user_id=user_id)
+            stats.current_streak = current
+            stats.longest_streak = longest
+            stats.last_active_date = last_day
+            (to_update if stats.pk else to_create).append(stats)
+        
+        UserStats.objects.bulk_create(to_create, batch_size=batch_size)
+        UserStats.objects.bulk_update(
+            to_update,
+            ['current_streak', 'longest_streak', 'last_active_date'],
+            batch_size=batch_size
+        )
+        
+        # Users without any activity have no streak; a subquery keeps the statement small
+        reset = UserStats.objects.exclude(user_id__in=UserActivity.objects.values('user_id')).update(
+            current_streak=0, longest_streak=0, last_active_date=None
+        )
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt streaks for {len(streaks)} users ({len(to_create)} stats rows created, {reset} reset)'
+        ))
@@ -0,0 +1,416 @@
+import json
+import math
+import random
+import statistics
+import time
+import tracemalloc
+import warnings
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api import urls as api_urls
+from api.activity import activity_recorder
+from api.llm import reset_provider
+from api.models import LearningPath, LearningJourney, Topic, Quiz, Enrollment, GenerationJob
+from api.skill_templates import skill_template_registry
+from api.synthetic import SKILLS, create_users, populate_users
+from api.tutor_cache import tutor_answer_cache
+
+# One request type per url name in api/urls.py. ``build`` returns the request
+# to send for an actor; it runs before the timer starts, so any setup it does
+# (such as issuing a token to log out) is not measured.
+Scenario = namedtuple('Scenario', ['name', 'method', 'weight', 'build', 'staff'])
+
+QUESTIONS = [
+    'What is {skill}?', 'How do I get started with {skill}?', 'What are the best practices in {skill}?',
+    'Explain the basics of {skill} with an example', 'Which projects help me practice {skill}?',
+]
+
+class Actor:
+    """A benchmark user: their auth header and the content they can act on"""
+
+    def __init__(self, user, token):
+        self.user = user
+        self.headers = {'Authorization': f'Token {token.key}'}
+        self.etags = {}
+        self.path_ids = list(Enrollment.objects.filter(user=user).order_by('id').values_list('learning_path_id', flat=True))
+        self.journey_ids = list(
+            LearningJourney.objects.filter(learning_path__in=self.path_ids).order_by('id').values_list('id', flat=True)
+        )
+        self.topics = defaultdict(list)
+        for journey_id, topic_id in Topic.objects.filter(learning_journey__in=self.journey_ids).values_list('learning_journey_id', 'id'):
+            self.topics[journey_id].append(topic_id)
+        self.quiz_ids = list(Quiz.objects.filter(topic__learning_journey__in=self.journey_ids).values_list('id', flat=True))
+        self.job_id = GenerationJob.objects.create(user=user, params={}).pk
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a synthetic dataset in a throwaway test database and drives every API endpoint with '
+        'a weighted request mix, reporting latency percentiles, queries and allocations per endpoint'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Synthetic users to seed')
+        parser.add_argument('--paths-per-user', type=int, default=1)
+        parser.add_argument('--journeys-per-path', type=int, default=3)
+        parser.add_argument('--topics-per-journey', type=int, default=8)
+        parser.add_argument('--quizzes-per-topic', type=int, default=1)
+        parser.add_argument('--quiz-results-per-user', type=int, default=10)
+        parser.add_argument('--activity-days', type=int, default=30)
+        parser.add_argument('--active-users', type=int, default=20, help='Seeded users that send the requests')
+        parser.add_argument('--requests', type=int, default=2000, help='Timed requests in the mix')
+        parser.add_argument('--min-samples', type=int, default=10, help='Timed requests per endpoint at least')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed requests per endpoint before the mix')
+        parser.add_argument('--alloc-samples', type=int, default=5, help='Requests per endpoint traced for allocations')
+        parser.add_argument(
+            '--revalidate', type=float, default=0.3,
+            help='Share of tree requests sent with the ETag of an earlier response'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the dataset and the request mix')
+        parser.add_argument('--in-place', action='store_true', help='Seed the configured database instead of a test database')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Relative increase in p95 latency or allocations reported as a regression'
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=1.0,
+            help='Smallest p95 increase in milliseconds reported as a regression'
+        )
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error if anything regressed')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        old_name = None
+        if not options['in_place']:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        llm = {'BACKEND': 'fake', 'LATENCY': 0, 'FAILURE_RATE': 0, 'CHUNK_INTERVAL': 0}
+        try:
+            with override_settings(LLM_PROVIDER=llm, ALLOWED_HOSTS=['testserver']):
+                self.reset_state()
+                self.seed(options)
+                results = self.run(options)
+        finally:
+            self.reset_state()
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        results['meta'].update({
+            'created_at': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        })
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options['tolerance'], options['min_delta_ms'])
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f'Regression: {regression}'))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
+            elif options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+
+    def reset_state(self):
+        """Start from empty process-local caches, which would otherwise outlive the database"""
+        cache.clear()
+        caches['generation'].clear()
+        tutor_answer_cache.reset()
+        activity_recorder.reset()
+        skill_template_registry.invalidate()
+        reset_provider()
+
+    def seed(self, options):
+        if options['users'] < options['active_users'] or options['active_users'] < 1:
+            raise CommandError('--active-users must be between 1 and --users')
+        self.prefix = 'bench-' if not options['in_place'] else f'bench-{time.time_ns()}-'
+        params = {
+            key: options[key] for key in (
+                'users', 'paths_per_user', 'journeys_per_path', 'topics_per_journey', 'quizzes_per_topic',
+                'quiz_results_per_user', 'activity_days', 'seed',
+            )
+        }
+        params.update(prefix=self.prefix, batch_size=1000, chunk_users=500)
+        self.dataset = {key: value for key, value in params.items() if key not in ('prefix', 'batch_size', 'chunk_users')}
+
+        started = time.perf_counter()
+        user_range = create_users(params)
+        counts = populate_users(user_range, params)
+        self.stdout.write(
+            f"Seeded {options['users']} users and {sum(counts.values())} rows in {time.perf_counter() - started:.1f}s"
+        )
+
+        users = list(User.objects.filter(username__startswith=self.prefix).order_by('id'))
+        self.actors = [Actor(user, Token.objects.create(user=user)) for user in users[:options['active_users']]]
+        self.usernames = [user.username for user in users]
+        self.path_ids = list(LearningPath.objects.filter(enrollments__user__in=users).values_list('id', flat=True))
+
+        admin = User.objects.create_user(username=f'{self.prefix}admin', is_staff=True)
+        self.admin = Actor(admin, Token.objects.create(user=admin))
+        self.session_user = User.objects.create_user(username=f'{self.prefix}session', password='password')
+        self.registered = 0
+        self.revalidate = options['revalidate']
+
+    def scenarios(self):
+        return [
+            Scenario('learning-path-detail', 'get', 15, self.build_path_detail, False),
+            Scenario('learning-journey-detail', 'get', 10, self.build_journey_detail, False),
+            Scenario('learning-path-list', 'get', 8, self.build_path_list, False),
+            Scenario('topic-update', 'patch', 8, self.build_topic_update, False),
+            Scenario('user-stats', 'get', 8, self.build_get('user-stats'), False),
+            Scenario('top-learning-paths', 'get', 5, self.build_get('top-learning-paths'), False),
+            Scenario('quiz-performance', 'get', 5, self.build_get('quiz-performance'), False),
+            Scenario('learning-insights', 'get', 4, self.build_get('learning-insights'), False),
+            Scenario('user-detail', 'get', 4, self.build_get('auth/user'), False),
+            Scenario('save-quiz-result', 'post', 4, self.build_quiz_result, False),
+            Scenario('recommendations', 'get', 3, self.build_get('recommendations'), False),
+            Scenario('topic-bulk-update', 'post', 3, self.build_bulk_update, False),
+            Scenario('ask-ai-tutor', 'post', 3, self.build_question('ask-ai-tutor'), False),
+            Scenario('learning-path-enroll', 'post', 2, self.build_enroll, False),
+            Scenario('generation-job-detail', 'get', 2, self.build_job_detail, False),
+            Scenario('ask-ai-tutor-async', 'post', 1, self.build_question('ask-ai-tutor/async'), False),
+            Scenario('ask-ai-tutor-stream', 'get', 1, self.build_question('ask-ai-tutor/stream'), False),
+            Scenario('generate-learning-path', 'post', 1, self.build_generate('generate-learning-path'), False),
+            Scenario('generate-learning-path-async', 'post', 1, self.build_generate('generate-learning-path/async'), False),
+            Scenario('predict', 'post', 1, self.build_predict, False),
+            Scenario('login', 'post', 1, self.build_login, False),
+            Scenario('logout', 'post', 1, self.build_logout, False),
+            Scenario('register', 'post', 1, self.build_register, False),
+            Scenario('generation-cache-stats', 'get', 1, self.build_get('generation-cache/stats'), True),
+            Scenario('tutor-cache-stats', 'get', 1, self.build_get('ask-ai-tutor/cache-stats'), True),
+        ]
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        scenarios = self.scenarios()
+        missing = {pattern.name for pattern in api_urls.urlpatterns} - {scenario.name for scenario in scenarios}
+        for name in sorted(missing):
+            self.stdout.write(self.style.WARNING(f'No benchmark scenario for endpoint {name}'))
+
+        client = Client(raise_request_exception=False)
+        for scenario in scenarios:
+            for _ in range(options['warmup']):
+                self.call(client, scenario, rng)
+
+        # Every endpoint gets its minimum, the rest of the mix follows the weights
+        schedule = [scenario for scenario in scenarios for _ in range(options['min_samples'])]
+        remaining = options['requests'] - len(schedule)
+        if remaining > 0:
+            schedule += rng.choices(scenarios, weights=[scenario.weight for scenario in scenarios], k=remaining)
+        rng.shuffle(schedule)
+
+        samples = defaultdict(list)
+        started = time.perf_counter()
+        for scenario in schedule:
+            samples[scenario.name].append(self.call(client, scenario, rng))
+        elapsed = time.perf_counter() - started
+
+        # Tracing slows every allocation down, so allocations get their own pass
+        allocations = defaultdict(list)
+        if options['alloc_samples']:
+            tracemalloc.start()
+            try:
+                for scenario in scenarios:
+                    for _ in range(options['alloc_samples']):
+                        allocations[scenario.name].append(self.call(client, scenario, rng, trace=True))
+            finally:
+                tracemalloc.stop()
+
+        endpoints = {}
+        for scenario in scenarios:
+            latencies = sorted(latency for latency, queries, status in samples[scenario.name])
+            queries = [queries for latency, queries, status in samples[scenario.name]]
+            endpoints[scenario.name] = {
+                'method': scenario.method.upper(),
+                'requests': len(latencies),
+                'errors': sum(1 for latency, queries, status in samples[scenario.name] if status >= 400),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+                'mean_ms': round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+                'queries': round(statistics.fmean(queries), 2) if queries else 0.0,
+                'max_queries': max(queries, default=0),
+                'alloc_kb': round(statistics.median(allocations[scenario.name]) / 1024, 1) if allocations[scenario.name] else None,
+            }
+        return {
+            'meta': {
+                'dataset': self.dataset,
+                'active_users': len(self.actors),
+                'requests': len(schedule),
+                'elapsed_s': round(elapsed, 3),
+                'throughput_rps': round(len(schedule) / elapsed, 1) if elapsed else 0.0,
+            },
+            'endpoints': endpoints,
+        }
+
+    def call(self, client, scenario, rng, trace=False):
+        """
+        Send one request of a scenario. Returns ``(seconds, queries, status)``,
+        or the peak bytes allocated while handling it with ``trace``.
+        """
+        actor = self.admin if scenario.staff else rng.choice(self.actors)
+        request = scenario.build(actor, rng)
+        kwargs = {'headers': request.get('headers', actor.headers)}
+        if scenario.method != 'get':
+            kwargs['content_type'] = 'application/json'
+
+        if trace:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, scenario.method)(request['path'], request.get('data'), **kwargs)
+            if response.streaming:
+                with warnings.catch_warnings():
+                    # The streaming tutor is async; the test client drains it synchronously
+                    warnings.simplefilter('ignore')
+                    b''.join(response)
+        elapsed = time.perf_counter() - started
+        if trace:
+            return tracemalloc.get_traced_memory()[1] - base
+
+        if response.has_header('ETag'):
+            actor.etags[request['path']] = response['ETag']
+        return elapsed, len(queries), response.status_code
+
+    def report(self, results):
+        meta = results['meta']
+        self.stdout.write(
+            f"{meta['requests']} requests from {meta['active_users']} users in {meta['elapsed_s']:.1f}s "
+            f"({meta['throughput_rps']:.0f} req/s)"
+        )
+        self.stdout.write(
+            f"{'endpoint':<30} {'method':<6} {'n':>5} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>7} {'alloc KB':>9}"
+        )
+        for name, row in sorted(results['endpoints'].items()):
+            alloc = f"{row['alloc_kb']:.1f}" if row['alloc_kb'] is not None else '-'
+            line = (
+                f"{name:<30} {row['method']:<6} {row['requests']:>5} {row['errors']:>4} {row['p50_ms']:>8.2f} "
+                f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['queries']:>7.1f} {alloc:>9}"
+            )
+            self.stdout.write(self.style.ERROR(line) if row['errors'] else line)
+
+    # Request builders
+
+    def build_get(self, url):
+        return lambda actor, rng: {'path': f'/api/{url}/'}
+
+    def conditional(self, actor, rng, path):
+        request = {'path': path}
+        etag = actor.etags.get(path)
+        if etag and rng.random() < self.revalidate:
+            request['headers'] = dict(actor.headers, **{'If-None-Match': etag})
+        return request
+
+    def build_path_detail(self, actor, rng):
+        return self.conditional(actor, rng, f'/api/learning-paths/{rng.choice(actor.path_ids)}/')
+
+    def build_journey_detail(self, actor, rng):
+        return self.conditional(actor, rng, f'/api/learning-journeys/{rng.choice(actor.journey_ids)}/')
+
+    def build_path_list(self, actor, rng):
+        return {'path': '/api/learning-paths/', 'data': {'user': 'me'} if rng.random() < 0.5 else None}
+
+    def build_topic_update(self, actor, rng):
+        topic_id = rng.choice(actor.topics[rng.choice(actor.journey_ids)])
+        return {'path': f'/api/topics/{topic_id}/', 'data': {'is_completed': rng.random() < 0.7}}
+
+    def build_bulk_update(self, actor, rng):
+        topics = actor.topics[rng.choice(actor.journey_ids)]
+        return {
+            'path': '/api/topics/bulk-update/',
+            'data': [{'id': topic_id, 'is_completed': True} for topic_id in rng.sample(topics, min(3, len(topics)))],
+        }
+
+    def build_quiz_result(self, actor, rng):
+        return {'path': '/api/save-quiz-result/', 'data': {'quiz_id': rng.choice(actor.quiz_ids), 'score': rng.randint(40, 100)}}
+
+    def build_enroll(self, actor, rng):
+        return {'path': f'/api/learning-paths/{rng.choice(self.path_ids)}/enroll/'}
+
+    def build_job_detail(self, actor, rng):
+        return {'path': f'/api/generation-jobs/{actor.job_id}/'}
+
+    def build_question(self, url):
+        def build(actor, rng):
+            question = rng.choice(QUESTIONS).format(skill=rng.choice(SKILLS))
+            return {'path': f'/api/{url}/', 'data': {'question': question}}
+        return build
+
+    def build_generate(self, url):
+        def build(actor, rng):
+            return {'path': f'/api/{url}/', 'data': {
+                'target_date': (timezone.now().date() + timedelta(weeks=rng.choice([4, 8, 12]))).isoformat(),
+                'study_hours': rng.choice([5, 10, 15]),
+                'selected_skills': rng.sample(SKILLS, 2),
+            }}
+        return build
+
+    def build_predict(self, actor, rng):
+        return {'path': '/api/predict/', 'data': {'input': 'benchmark'}}
+
+    def build_login(self, actor, rng):
+        return {
+            'path': '/api/auth/login/', 'headers': {},
+            'data': {'username': rng.choice(self.usernames), 'password': 'password'},
+        }
+
+    def build_logout(self, actor, rng):
+        # A session of its own, so logging out never revokes an actor's token
+        token, created = Token.objects.get_or_create(user=self.session_user)
+        return {'path': '/api/auth/logout/', 'headers': {'Authorization': f'Token {token.key}'}}
+
+    def build_register(self, actor, rng):
+        self.registered += 1
+        username = f'{self.prefix}new{self.registered}'
+        return {'path': '/api/auth/register/', 'headers': {}, 'data': {
+            'username': username, 'email': f'{username}@example.com', 'first_name': 'Bench', 'last_name': 'User',
+            'password': 'Benchmark-pass-1', 'password2': 'Benchmark-pass-1', 'user_type': 'student',
+        }}
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+def compare(results, baseline, tolerance=0.25, min_delta_ms=1.0):
+    """
+    Describe the endpoints that got slower, allocate more or run more queries
+    than in the baseline results
+    """
+    regressions = []
+    for name, row in sorted(results['endpoints'].items()):
+        before = baseline.get('endpoints', {}).get(name)
+        if before is None:
+            continue
+        if row['p95_ms'] > before['p95_ms'] * (1 + tolerance) and row['p95_ms'] - before['p95_ms'] >= min_delta_ms:
+            regressions.append(f"{name}: p95 {before['p95_ms']:.2f} ms -> {row['p95_ms']:.2f} ms")
+        if row['queries'] >= before['queries'] + 1:
+            regressions.append(f"{name}: {before['queries']:.1f} -> {row['queries']:.1f} queries per request")
+        if row['alloc_kb'] is not None and before.get('alloc_kb') is not None and row['alloc_kb'] > before['alloc_kb'] * (1 + tolerance):
+            regressions.append(f"{name}: {before['alloc_kb']:.1f} KB -> {row['alloc_kb']:.1f} KB allocated")
+        if row['errors'] > before['errors']:
+            regressions.append(f"{name}: {before['errors']} -> {row['errors']} errors")
+    return regressions
@@ -0,0 +1,83 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from api.tutor_cache import tutor_answer_cache
+
+class Command(BaseCommand):
+    help = 'Compares AI tutor throughput of the WSGI (thread per request) and ASGI (async) views against the fake LLM'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--latency', type=float, default=0.5, help='Fake model latency in seconds')
+        parser.add_argument('--wsgi-threads', type=int, default=8, help='Worker threads of the simulated WSGI process')
+        parser.add_argument('--concurrency', type=int, default=200, help='Requests in flight at once on the async view')
+
+    def handle(self, *args, **options):
+        llm = {'BACKEND': 'fake', 'LATENCY': options['latency'], 'TIMEOUT': options['latency'] * 10 + 5}
+        user = User.objects.create_user(username=f'benchmark-{time.time_ns()}')
+        token = Token.objects.create(user=user)
+        headers = {'Authorization': f'Token {token.key}'}
+        try:
+            with override_settings(LLM_PROVIDER=llm, ALLOWED_HOSTS=['testserver']):
+                tutor_answer_cache.reset()
+                wsgi = self.run_wsgi(options, headers)
+                tutor_answer_cache.reset()
+                asgi = asyncio.run(self.run_asgi(options, headers))
+        finally:
+            user.delete()
+            tutor_answer_cache.reset()
+        
+        self.stdout.write(f"{options['requests']} tutor requests, fake model latency {options['latency'] * 1000:.0f} ms")
+        self.report(f"WSGI, {options['wsgi_threads']} threads", *wsgi)
+        self.report(f"ASGI, {options['concurrency']} in flight", *asgi)
+        self.stdout.write(self.style.SUCCESS(f'ASGI throughput: {wsgi[0] / asgi[0]:.1f}x WSGI'))
+
+    def report(self, label, elapsed, latencies):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f'{label}: {len(latencies) / elapsed:.1f} req/s, '
+            f'p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms'
+        )
+
+    def run_wsgi(self, options, headers):
+        client = Client()
+        
+        def call(i):
+            started = time.perf_counter()
+            response = client.post(
+                '/api/ask-ai-tutor/', {'question': f'Benchmark question {i}'},
+                content_type='application/json', headers=headers
+            )
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - started
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['wsgi_threads']) as pool:
+            latencies = list(pool.map(call, range(options['requests'])))
+        return time.perf_counter() - started, latencies
+
+    async def run_asgi(self, options, headers):
+        client = AsyncClient()
+        slots = asyncio.Semaphore(options['concurrency'])
+        
+        async def call(i):
+            async with slots:
+                started = time.perf_counter()
+                response = await client.post(
+                    '/api/ask-ai-tutor/async/', {'question': f'Benchmark question {i}'},
+                    content_type='application/json', headers=headers
+                )
+                assert response.status_code == 200, response.content
+                return time.perf_counter() - started
+        
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*[call(i) for i in range(options['requests'])])
+        return time.perf_counter() - started, latencies
@@ -0,0 +1,69 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.models import LearningPath, LearningJourney, Topic, Quiz
+from api.serializers import LearningPathSerializer
+from api.trees import render_learning_path
+
+class Command(BaseCommand):
+    help = 'Compares LearningPathSerializer with the plain-dict tree renderer on a synthetic path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--journeys', type=int, default=20)
+        parser.add_argument('--topics', type=int, default=25, help='Topics per journey')
+        parser.add_argument('--quizzes', type=int, default=3, help='Quizzes per topic')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        # The synthetic tree is rolled back once the benchmark is done
+        with transaction.atomic():
+            path = self.build_tree(options['journeys'], options['topics'], options['quizzes'])
+            repeat = options['repeat']
+            
+            serializer_time = self.time(
+                lambda: LearningPathSerializer(LearningPath.objects.with_tree().get(pk=path.pk)).data, repeat
+            )
+            renderer_time = self.time(lambda: render_learning_path(path.pk), repeat)
+            
+            if render_learning_path(path.pk) != LearningPathSerializer(LearningPath.objects.with_tree().get(pk=path.pk)).data:
+                self.stdout.write(self.style.ERROR('Renderer output differs from LearningPathSerializer'))
+            
+            transaction.set_rollback(True)
+        
+        nodes = options['journeys'] * options['topics'] * (1 + options['quizzes'])
+        self.stdout.write(f'Tree: {nodes} topics and quizzes, {repeat} renders each')
+        self.stdout.write(f'LearningPathSerializer: {serializer_time * 1000:.1f} ms/render')
+        self.stdout.write(f'render_learning_path:   {renderer_time * 1000:.1f} ms/render')
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {serializer_time / renderer_time:.1f}x'))
+
+    def time(self, func, repeat):
+        func()  # Warm up
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) / repeat
+
+    def build_tree(self, journeys, topics, quizzes):
+        path = LearningPath.objects.create(title='Benchmark Path', description='Synthetic path', duration='8 weeks')
+        journey_objs = LearningJourney.objects.bulk_create([
+            LearningJourney(
+                title=f'Journey {i+1}', description='Synthetic journey', learning_path=path,
+                total_lessons=topics
+            )
+            for i in range(journeys)
+        ])
+        topic_objs = Topic.objects.bulk_create([
+            Topic(
+                title=f'Topic {j+1}', description='Synthetic topic', learning_journey=journey,
+                order=j+1, duration='2 hours'
+            )
+            for journey in journey_objs for j in range(topics)
+        ])
+        Quiz.objects.bulk_create([
+            Quiz(
+                title=f'Quiz {k+1}', description='Synthetic quiz', topic=topic,
+                duration='30 minutes', difficulty='Intermediate', questions_count=10
+            )
+            for topic in topic_objs for k in range(quizzes)
+        ])
+        return path
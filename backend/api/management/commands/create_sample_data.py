@@ -1,14 +1,38 @@
-from django.core.management.base import BaseCommand
+import django
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
+from django.db import connections
 from api.models import LearningPath, LearningJourney, Topic, Quiz, UserProfile, UserStats, UserActivity, QuizResult, LearningInsight
+from api.synthetic import create_users, populate_users, split_range
 from django.utils import timezone
+import multiprocessing
 import random
+import time
+from collections import Counter
 from datetime import timedelta
 
 class Command(BaseCommand):
-    help = 'Creates sample data for the EduSmart application'
+    help = 'Creates sample data for the EduSmart application, or a synthetic dataset at scale with --users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=0, help='Create a synthetic dataset with this many users instead of the sample paths')
+        parser.add_argument('--paths-per-user', type=int, default=1)
+        parser.add_argument('--journeys-per-path', type=int, default=3)
+        parser.add_argument('--topics-per-journey', type=int, default=5)
+        parser.add_argument('--quizzes-per-topic', type=int, default=1)
+        parser.add_argument('--quiz-results-per-user', type=int, default=5)
+        parser.add_argument('--activity-days', type=int, default=30, help='Active days per user, spread over twice as many days')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk insert')
+        parser.add_argument('--chunk-users', type=int, default=200, help='Users written per transaction')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes, each taking a range of user ids')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for a reproducible dataset')
+        parser.add_argument('--prefix', default='synthetic', help='Username prefix of the synthetic users')
 
     def handle(self, *args, **options):
+        if options['users']:
+            self.create_synthetic_data(options)
+            return
+        
         self.stdout.write('Creating sample data...')
         
         # Create sample learning paths
@@ -16,6 +40,38 @@ class Command(BaseCommand):
         
         self.stdout.write(self.style.SUCCESS('Sample data created successfully!'))
     
+    def create_synthetic_data(self, options):
+        params = {key: options[key] for key in (
+            'users', 'paths_per_user', 'journeys_per_path', 'topics_per_journey', 'quizzes_per_topic',
+            'quiz_results_per_user', 'activity_days', 'batch_size', 'chunk_users', 'seed', 'prefix',
+        )}
+        if User.objects.filter(username__startswith=params['prefix']).exists():
+            raise CommandError(f"Users named {params['prefix']}* already exist, pick another --prefix")
+        
+        start = time.perf_counter()
+        first_id, last_id = create_users(params)
+        self.stdout.write(f"Created {params['users']} users in {time.perf_counter() - start:.1f}s")
+        
+        ranges = split_range(first_id, last_id, max(options['workers'], 1))
+        if len(ranges) == 1:
+            results = [populate_users(ranges[0], params)]
+        else:
+            # Workers open their own connections
+            connections.close_all()
+            with multiprocessing.Pool(len(ranges), initializer=django.setup) as pool:
+                results = pool.starmap(populate_users, [(id_range, params) for id_range in ranges])
+        
+        counts = Counter({'User': params['users'], 'UserProfile': params['users']})
+        for result in results:
+            counts.update(result)
+        elapsed = time.perf_counter() - start
+        for model, count in counts.items():
+            self.stdout.write(f'  {model}: {count}')
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s, {len(ranges)} workers)'
+        ))
+    
     def create_sample_learning_paths(self):
         # Sample learning paths
         paths_data = [
@@ -285,10 +341,7 @@ class Command(BaseCommand):
                 journey = LearningJourney.objects.create(
                     title=journey_data["title"],
                     description=journey_data["description"],
-                    learning_path=path,
-                    total_lessons=len(journey_data["topics"]),
-                    completed_lessons=0,
-                    progress=0
+                    learning_path=path
                 )
                 
                 # Create topics for this journey
@@ -311,8 +364,5 @@ class Command(BaseCommand):
                             difficulty=quiz_data["difficulty"],
                             questions_count=quiz_data["questions_count"]
                         )
-                
-                # Update journey progress
-                journey.update_progress()
             
             self.stdout.write(f"Created learning path: {path.title}")
@@ -0,0 +1,86 @@
+import csv
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from api.models import LearningPath, Enrollment
+
+class Command(BaseCommand):
+    help = 'Enrolls users in an existing learning path without copying its content'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path_id', type=int, help='Learning path to enroll the users in')
+        parser.add_argument('--username', action='append', default=[], help='Username to enroll (repeatable)')
+        parser.add_argument('--file', help='CSV or text file with a username or user id in the first column of each row')
+        parser.add_argument('--all', action='store_true', help='Enroll every user')
+        parser.add_argument('--user-type', choices=['student', 'parent', 'teacher'], help='With --all, only users of this type')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per batched insert')
+
+    def handle(self, *args, **options):
+        path_id = options['path_id']
+        if not LearningPath.objects.filter(pk=path_id).exists():
+            raise CommandError(f'Learning path {path_id} does not exist')
+
+        batch_size = options['batch_size']
+        if options['all']:
+            users = User.objects.order_by('id')
+            if options['user_type']:
+                users = users.filter(profile__user_type=options['user_type'])
+            user_ids = users.values_list('id', flat=True).iterator(chunk_size=batch_size)
+        else:
+            names = list(options['username'])
+            if options['file']:
+                with open(options['file'], newline='') as f:
+                    names.extend(row[0].strip() for row in csv.reader(f) if row and row[0].strip())
+            if not names:
+                raise CommandError('Pass --username, --file or --all')
+            user_ids = self.resolve(names, batch_size)
+
+        start = time.perf_counter()
+        counted = CountingIterator(user_ids)
+        enrolled = Enrollment.enroll_users(path_id, counted, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f'{counted.count - enrolled} users were already enrolled')
+        self.stdout.write(self.style.SUCCESS(
+            f'Enrolled {enrolled} users in learning path {path_id} in {elapsed:.2f}s '
+            f'({counted.count / elapsed if elapsed else 0:.0f} users/s)'
+        ))
+
+    def resolve(self, names, batch_size):
+        """Yield the ids of the given usernames or numeric ids, warning about unknown ones"""
+        names = iter(dict.fromkeys(names))
+        while chunk := list(islice(names, batch_size)):
+            ids = [int(name) for name in chunk if name.isdigit()]
+            found = dict(User.objects.filter(username__in=chunk).values_list('username', 'id'))
+            found_ids = set(User.objects.filter(pk__in=ids).values_list('id', flat=True)) if ids else set()
+            for name in chunk:
+                if name in found:
+                    yield found[name]
+                elif name.isdigit() and int(name) in found_ids:
+                    yield int(name)
+                else:
+                    self.stdout.write(self.style.WARNING(f'Unknown user: {name}'))
+
+class CountingIterator:
+    """Draws the distinct items from an iterator, counting them"""
+
+    def __init__(self, iterable):
+        self.iterator = iter(iterable)
+        self.seen = set()
+
+    @property
+    def count(self):
+        return len(self.seen)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        # A name and an id can resolve to the same user; count and enroll them once
+        item = next(self.iterator)
+        while item in self.seen:
+            item = next(self.iterator)
+        self.seen.add(item)
+        return item
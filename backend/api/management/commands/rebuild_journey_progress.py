@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from api.models import LearningJourney
+
+class Command(BaseCommand):
+    help = 'Recomputes learning journey lesson counts from their topics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--journey', type=int, action='append', help='Only rebuild the given journey id (repeatable)')
+
+    def handle(self, *args, **options):
+        journeys = LearningJourney.objects.all()
+        if options['journey']:
+            journeys = journeys.filter(pk__in=options['journey'])
+        
+        count = 0
+        for journey in journeys.iterator():
+            journey.update_total_lessons()
+            count += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt lesson counts for {count} journeys'))
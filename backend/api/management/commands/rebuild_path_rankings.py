@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from api.models import LearningPath, PathRanking
+
+class Command(BaseCommand):
+    help = 'Recomputes learning path popularity rankings from enrollments, progress and quiz results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', type=int, action='append', help='Only rebuild the given path id (repeatable)')
+
+    def handle(self, *args, **options):
+        path_ids = LearningPath.objects.values_list('pk', flat=True)
+        if options['path']:
+            path_ids = path_ids.filter(pk__in=options['path'])
+        
+        count = 0
+        for path_id in path_ids.iterator():
+            PathRanking.rebuild(path_id)
+            count += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rankings for {count} learning paths'))
@@ -0,0 +1,38 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from api.generation import run_generation_job
+from api.models import GenerationJob
+
+class Command(BaseCommand):
+    help = 'Runs queued learning path generation jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run at most one job and exit')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty instead of polling')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--lease-seconds', type=int, default=300, help='How long a claimed job stays leased to this worker')
+        parser.add_argument('--worker-id', default=f'{socket.gethostname()}:{os.getpid()}', help='Lease owner name for this worker')
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            job = GenerationJob.claim(options['worker_id'], options['lease_seconds'])
+            if job is None:
+                if options['once'] or options['burst']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+            
+            if run_generation_job(job):
+                job.refresh_from_db()
+                self.stdout.write(f'Job {job.pk}: {job.status}')
+            else:
+                self.stdout.write(self.style.WARNING(f'Job {job.pk}: lease lost, result discarded'))
+            processed += 1
+            if options['once']:
+                break
+        
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} generation jobs'))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_learninginsight_quizresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='current_streak',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='last_active_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='longest_streak',
+            field=models.IntegerField(default=0),
+        ),
+    ]
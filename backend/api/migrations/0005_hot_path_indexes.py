@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_userstats_streak_state'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='learninginsight',
+            index=models.Index(fields=['user', 'insight_type'], name='insight_user_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='learningjourney',
+            index=models.Index(fields=['user', 'progress'], name='journey_user_progress_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['topic', 'is_completed', 'completed_at'], name='quiz_topic_done_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['user', 'date_taken'], name='quizresult_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['learning_journey', 'is_completed', 'order'], name='topic_journey_open_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['learning_journey', 'is_completed', 'completed_at'], name='topic_journey_done_at_idx'),
+        ),
+    ]
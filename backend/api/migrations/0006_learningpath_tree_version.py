@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningpath',
+            name='tree_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
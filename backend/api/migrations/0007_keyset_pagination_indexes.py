@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_learningpath_tree_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='learninginsight',
+            index=models.Index(fields=['user', 'created_at'], name='insight_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='learningpath',
+            index=models.Index(fields=['created_at', 'id'], name='path_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_rankings(apps, schema_editor):
+    # Start existing paths at zero; run the rebuild_path_rankings command to score them
+    LearningPath = apps.get_model('api', 'LearningPath')
+    PathRanking = apps.get_model('api', 'PathRanking')
+    PathRanking.objects.bulk_create(
+        [PathRanking(learning_path_id=pk) for pk in LearningPath.objects.values_list('pk', flat=True)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PathRanking',
+            fields=[
+                ('learning_path', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='api.learningpath')),
+                ('enrollments', models.IntegerField(default=0)),
+                ('total_lessons', models.IntegerField(default=0)),
+                ('completed_lessons', models.IntegerField(default=0)),
+                ('quiz_score_sum', models.FloatField(default=0)),
+                ('quiz_weight_sum', models.FloatField(default=0)),
+                ('score', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['score', 'learning_path'], name='ranking_score_idx')],
+            },
+        ),
+        migrations.RunPython(create_rankings, migrations.RunPython.noop),
+    ]
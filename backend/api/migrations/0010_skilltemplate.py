@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_generationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('synonyms', models.JSONField(blank=True, default=list)),
+                ('journey', models.JSONField(help_text='{"title", "description", "topics": [{"title", "description", "duration", "quizzes": [...]}]}')),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
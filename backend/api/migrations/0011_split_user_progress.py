@@ -0,0 +1,169 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+COMPLETED = 1
+
+
+def copy_progress(apps, schema_editor):
+    # Journey owners become enrolled users and keep the completion state that
+    # was stored on the shared rows. Run rebuild_path_rankings afterwards to
+    # rescore paths with the per-enrollment completion rate.
+    LearningJourney = apps.get_model('api', 'LearningJourney')
+    Topic = apps.get_model('api', 'Topic')
+    Quiz = apps.get_model('api', 'Quiz')
+    Enrollment = apps.get_model('api', 'Enrollment')
+    TopicProgress = apps.get_model('api', 'TopicProgress')
+    QuizProgress = apps.get_model('api', 'QuizProgress')
+    now = timezone.now()
+
+    owners = LearningJourney.objects.filter(user__isnull=False).values_list('user_id', 'learning_path_id').distinct()
+    Enrollment.objects.bulk_create(
+        [Enrollment(user_id=user_id, learning_path_id=path_id) for user_id, path_id in owners],
+        batch_size=1000, ignore_conflicts=True,
+    )
+    topics = Topic.objects.filter(is_completed=True, learning_journey__user__isnull=False).values_list(
+        'id', 'learning_journey__user_id', 'completed_at'
+    )
+    TopicProgress.objects.bulk_create(
+        [
+            TopicProgress(topic_id=pk, user_id=user_id, flags=COMPLETED, completed_at=completed_at or now)
+            for pk, user_id, completed_at in topics.iterator()
+        ],
+        batch_size=1000, ignore_conflicts=True,
+    )
+    quizzes = Quiz.objects.filter(is_completed=True, topic__learning_journey__user__isnull=False).values_list(
+        'id', 'topic__learning_journey__user_id', 'completed_at'
+    )
+    QuizProgress.objects.bulk_create(
+        [
+            QuizProgress(quiz_id=pk, user_id=user_id, flags=COMPLETED, completed_at=completed_at or now)
+            for pk, user_id, completed_at in quizzes.iterator()
+        ],
+        batch_size=1000, ignore_conflicts=True,
+    )
+
+
+def restore_progress(apps, schema_editor):
+    # Only the journey owner's progress fits back on the shared rows. Run
+    # rebuild_journey_progress afterwards to recompute the journey counters.
+    Topic = apps.get_model('api', 'Topic')
+    Quiz = apps.get_model('api', 'Quiz')
+    TopicProgress = apps.get_model('api', 'TopicProgress')
+    QuizProgress = apps.get_model('api', 'QuizProgress')
+
+    topics = TopicProgress.objects.annotate(done=F('flags').bitand(COMPLETED)).filter(
+        done=COMPLETED, user=F('topic__learning_journey__user')
+    ).values_list('topic_id', 'completed_at')
+    for pk, completed_at in topics.iterator():
+        Topic.objects.filter(pk=pk).update(is_completed=True, completed_at=completed_at)
+    quizzes = QuizProgress.objects.annotate(done=F('flags').bitand(COMPLETED)).filter(
+        done=COMPLETED, user=F('quiz__topic__learning_journey__user')
+    ).values_list('quiz_id', 'completed_at')
+    for pk, completed_at in quizzes.iterator():
+        Quiz.objects.filter(pk=pk).update(is_completed=True, completed_at=completed_at)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_skilltemplate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Enrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrolled_at', models.DateTimeField(auto_now_add=True)),
+                ('progress_version', models.PositiveIntegerField(default=1)),
+                ('learning_path', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='api.learningpath')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'learning_path'), name='enrollment_user_path_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TopicProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('flags', models.PositiveSmallIntegerField(default=0)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='api.topic')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='topic_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'completed_at'], name='topicprogress_user_done_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'topic'), name='topicprogress_user_topic_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('flags', models.PositiveSmallIntegerField(default=0)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='api.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'completed_at'], name='quizprogress_user_done_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'quiz'), name='quizprogress_user_quiz_uniq')],
+            },
+        ),
+        migrations.RunPython(copy_progress, restore_progress),
+        migrations.RemoveIndex(
+            model_name='learningjourney',
+            name='journey_user_progress_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='quiz',
+            name='quiz_topic_done_at_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='topic',
+            name='topic_journey_open_order_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='topic',
+            name='topic_journey_done_at_idx',
+        ),
+        migrations.RemoveField(
+            model_name='learningjourney',
+            name='completed_lessons',
+        ),
+        migrations.RemoveField(
+            model_name='learningjourney',
+            name='next_lesson',
+        ),
+        migrations.RemoveField(
+            model_name='learningjourney',
+            name='progress',
+        ),
+        migrations.RemoveField(
+            model_name='quiz',
+            name='completed_at',
+        ),
+        migrations.RemoveField(
+            model_name='quiz',
+            name='is_completed',
+        ),
+        migrations.RemoveField(
+            model_name='topic',
+            name='completed_at',
+        ),
+        migrations.RemoveField(
+            model_name='topic',
+            name='is_completed',
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['learning_journey', 'order'], name='topic_journey_order_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:12
+
+import datetime
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_split_user_progress'),
+    ]
+
+    operations = [
+        # Existing sums were weighted from the old fixed epoch
+        migrations.AddField(
+            model_name='pathranking',
+            name='quiz_epoch',
+            field=models.DateField(default=datetime.date(2024, 1, 1)),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='pathranking',
+            name='quiz_epoch',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+    ]
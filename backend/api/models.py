@@ -1,9 +1,13 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Prefetch, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Ln, NullIf
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
+from itertools import islice
 
 class UserProfile(models.Model):
     USER_TYPE_CHOICES = (
@@ -19,46 +23,73 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.get_user_type_display()}"
 
+class LearningPathQuerySet(models.QuerySet):
+    def with_tree(self):
+        """Prefetch journeys, topics and quizzes so rendering the tree costs a fixed number of queries"""
+        return self.prefetch_related(
+            Prefetch('journeys', queryset=LearningJourney.objects.order_by('id')),
+            Prefetch('journeys__topics', queryset=Topic.objects.order_by('order', 'id')),
+            Prefetch('journeys__topics__quizzes', queryset=Quiz.objects.order_by('id')),
+        )
+
+class LearningJourneyQuerySet(models.QuerySet):
+    def with_tree(self):
+        """Prefetch topics and quizzes so rendering the journey costs a fixed number of queries"""
+        return self.prefetch_related(
+            Prefetch('topics', queryset=Topic.objects.order_by('order', 'id')),
+            Prefetch('topics__quizzes', queryset=Quiz.objects.order_by('id')),
+        )
+
 class LearningPath(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     duration = models.CharField(max_length=50)  # e.g., "8 weeks"
     match_percentage = models.IntegerField(default=0)  # For recommendations
     created_at = models.DateTimeField(auto_now_add=True)
+    tree_version = models.PositiveIntegerField(default=1)  # Bumped whenever the nested tree changes
+    
+    class Meta:
+        indexes = [
+            # Keyset pagination of the path list
+            models.Index(fields=['created_at', 'id'], name='path_created_id_idx'),
+        ]
+    
+    objects = LearningPathQuerySet.as_manager()
     
     def __str__(self):
         return self.title
+    
+    @classmethod
+    def bump_tree_version(cls, **lookup):
+        """Invalidate cached trees of the paths matching ``lookup``"""
+        cls.objects.filter(**lookup).update(tree_version=F('tree_version') + 1)
 
 class LearningJourney(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
     learning_path = models.ForeignKey(LearningPath, on_delete=models.CASCADE, related_name='journeys')
     total_lessons = models.IntegerField(default=0)
-    completed_lessons = models.IntegerField(default=0)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='journeys', null=True, blank=True)
-    progress = models.IntegerField(default=0)  # Percentage of completion
-    next_lesson = models.CharField(max_length=200, blank=True, null=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='journeys', null=True, blank=True)  # Creator; learners enroll in the path
+    
+    objects = LearningJourneyQuerySet.as_manager()
+    
+    ALL_COMPLETED = "All lessons completed!"
     
     def __str__(self):
         return self.title
     
-    def update_progress(self):
-        """Update the progress based on completed topics"""
-        topics = self.topics.all()
-        if topics.count() > 0:
-            completed_topics = topics.filter(is_completed=True).count()
-            self.completed_lessons = completed_topics
-            self.progress = int((completed_topics / topics.count()) * 100)
-            
-            # Set next lesson
-            if completed_topics < topics.count():
-                next_topic = topics.filter(is_completed=False).order_by('order').first()
-                if next_topic:
-                    self.next_lesson = next_topic.title
-            else:
-                self.next_lesson = "All lessons completed!"
-                
-            self.save()
+    def update_total_lessons(self):
+        """Recount total_lessons from the journey's topics (repair path).
+
+        Topic saves and deletes keep the count current; this is for journeys
+        whose count has drifted.
+        """
+        total_topics = self.topics.count()
+        lessons_delta = total_topics - self.total_lessons
+        if lessons_delta:
+            self.total_lessons = total_topics
+            self.save(update_fields=['total_lessons'])
+            PathRanking.apply_delta(self.learning_path_id, total_lessons=lessons_delta)
 
 class Topic(models.Model):
     title = models.CharField(max_length=200)
@@ -66,23 +97,37 @@ class Topic(models.Model):
     learning_journey = models.ForeignKey(LearningJourney, on_delete=models.CASCADE, related_name='topics')
     order = models.IntegerField(default=0)  # For ordering topics within a journey
     duration = models.CharField(max_length=50)  # e.g., "2 hours"
-    is_completed = models.BooleanField(default=False)
-    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            # Ordered topics of a journey
+            models.Index(fields=['learning_journey', 'order'], name='topic_journey_order_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
     def save(self, *args, **kwargs):
-        # If marked as completed and completion time not set, set it now
-        if self.is_completed and not self.completed_at:
-            self.completed_at = timezone.now()
-        # If marked as not completed, clear the completion time
-        elif not self.is_completed and self.completed_at:
-            self.completed_at = None
-            
+        adding = self._state.adding
         super().save(*args, **kwargs)
-        # Update journey progress when a topic is saved
-        self.learning_journey.update_progress()
+        if adding:
+            self.count_lesson(1)
+    
+    def delete(self, *args, **kwargs):
+        completed = TopicProgress.objects.completed().filter(topic=self).count()
+        result = super().delete(*args, **kwargs)
+        self.count_lesson(-1, completed_delta=-completed)
+        return result
+    
+    def count_lesson(self, lessons_delta, completed_delta=0):
+        """Keep the journey's lesson count and the path ranking in step with an added or removed topic"""
+        LearningJourney.objects.filter(pk=self.learning_journey_id).update(
+            total_lessons=F('total_lessons') + lessons_delta
+        )
+        PathRanking.apply_delta(
+            self.learning_journey.learning_path_id,
+            total_lessons=lessons_delta, completed_lessons=completed_delta
+        )
 
 class Quiz(models.Model):
     title = models.CharField(max_length=200)
@@ -91,21 +136,163 @@ class Quiz(models.Model):
     duration = models.CharField(max_length=50)  # e.g., "30 minutes"
     difficulty = models.CharField(max_length=50)  # e.g., "Beginner", "Intermediate"
     questions_count = models.IntegerField(default=0)
-    is_completed = models.BooleanField(default=False)
-    completed_at = models.DateTimeField(null=True, blank=True)
     
     def __str__(self):
         return self.title
+
+class Enrollment(models.Model):
+    """
+    A user following a learning path. The path's journeys, topics and quizzes
+    are shared by every enrolled user; each user's progress is kept in
+    TopicProgress and QuizProgress.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='enrollments')
+    learning_path = models.ForeignKey(LearningPath, on_delete=models.CASCADE, related_name='enrollments')
+    enrolled_at = models.DateTimeField(auto_now_add=True)
+    progress_version = models.PositiveIntegerField(default=1)  # Bumped whenever the user's progress on the path changes
     
-    def save(self, *args, **kwargs):
-        # If marked as completed and completion time not set, set it now
-        if self.is_completed and not self.completed_at:
-            self.completed_at = timezone.now()
-        # If marked as not completed, clear the completion time
-        elif not self.is_completed and self.completed_at:
-            self.completed_at = None
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'learning_path'], name='enrollment_user_path_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} on {self.learning_path_id}"
+    
+    @classmethod
+    def enroll(cls, user, learning_path_id):
+        """Enroll ``user`` in a path if they are not already, and return the enrollment"""
+        enrollment, created = cls.objects.get_or_create(user=user, learning_path_id=learning_path_id)
+        return enrollment
+    
+    @classmethod
+    def enroll_users(cls, learning_path_id, user_ids, batch_size=1000):
+        """
+        Enroll many users in a path with one batched insert per chunk of
+        ``batch_size`` users, skipping users who are already enrolled.
+        Returns the number of new enrollments.
+        """
+        enrolled = 0
+        user_ids = iter(user_ids)
+        while chunk := list(dict.fromkeys(islice(user_ids, batch_size))):
+            with transaction.atomic():
+                existing = set(cls.objects.filter(
+                    learning_path_id=learning_path_id, user_id__in=chunk
+                ).values_list('user_id', flat=True))
+                new = [cls(user_id=user_id, learning_path_id=learning_path_id) for user_id in chunk if user_id not in existing]
+                # bulk_create skips the ranking signal, so count the chunk once
+                cls.objects.bulk_create(new, ignore_conflicts=True)
+                PathRanking.apply_delta(learning_path_id, enrollments=len(new))
+            enrolled += len(new)
+        return enrolled
+    
+    @classmethod
+    def bump_progress_version(cls, user, learning_path_ids):
+        """Invalidate cached trees showing ``user``'s progress on the given paths"""
+        cls.objects.filter(user=user, learning_path_id__in=learning_path_ids).update(
+            progress_version=F('progress_version') + 1
+        )
+
+class ProgressQuerySet(models.QuerySet):
+    def completed(self):
+        return self.alias(completed_flag=F('flags').bitand(Progress.COMPLETED)).filter(completed_flag=Progress.COMPLETED)
+
+class Progress(models.Model):
+    """
+    One user's state on one content row, stored as bit flags plus the time
+    the row was completed. Rows only exist once the user has done something.
+    """
+    COMPLETED = 1
+    
+    flags = models.PositiveSmallIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    objects = ProgressQuerySet.as_manager()
+    
+    class Meta:
+        abstract = True
+    
+    # Set by subclasses: the content foreign key and its lookup to the path
+    target = None
+    path_lookup = None
+    
+    @classmethod
+    def set_completed(cls, user, ids, completed=True):
+        """
+        Mark the content rows ``ids`` completed (or open again) for ``user``
+        and return the ids whose state changed.
+        """
+        target_id = f'{cls.target}_id'
+        ids = list(dict.fromkeys(ids))
+        with transaction.atomic():
+            stored = dict(
+                cls.objects.filter(user=user, **{f'{target_id}__in': ids}).values_list(target_id, 'flags')
+            )
+            changed = [pk for pk in ids if bool(stored.get(pk, 0) & cls.COMPLETED) != completed]
+            if not changed:
+                return []
             
-        super().save(*args, **kwargs)
+            rows = cls.objects.filter(user=user, **{f'{target_id}__in': [pk for pk in changed if pk in stored]})
+            if completed:
+                now = timezone.now()
+                rows.update(flags=F('flags').bitor(cls.COMPLETED), completed_at=now)
+                cls.objects.bulk_create([
+                    cls(user=user, flags=cls.COMPLETED, completed_at=now, **{target_id: pk})
+                    for pk in changed if pk not in stored
+                ])
+            else:
+                rows.update(flags=F('flags').bitand(~cls.COMPLETED), completed_at=None)
+            
+            target_model = cls._meta.get_field(cls.target).related_model
+            per_path = dict(
+                target_model.objects.filter(pk__in=changed).order_by()
+                .values_list(cls.path_lookup).annotate(n=Count('id'))
+            )
+            cls.progress_changed(user, per_path, 1 if completed else -1)
+        return changed
+    
+    @classmethod
+    def progress_changed(cls, user, per_path, sign):
+        """Called with the number of rows that changed on each path"""
+        Enrollment.bump_progress_version(user, per_path)
+
+class TopicProgress(Progress):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='topic_progress')
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE, related_name='progress')
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'topic'], name='topicprogress_user_topic_uniq'),
+        ]
+        indexes = [
+            # Topics a user completed within a period
+            models.Index(fields=['user', 'completed_at'], name='topicprogress_user_done_idx'),
+        ]
+    
+    target = 'topic'
+    path_lookup = 'learning_journey__learning_path'
+    
+    @classmethod
+    def progress_changed(cls, user, per_path, sign):
+        super().progress_changed(user, per_path, sign)
+        for path_id, count in per_path.items():
+            PathRanking.apply_delta(path_id, completed_lessons=sign * count)
+
+class QuizProgress(Progress):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_progress')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='progress')
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'quiz'], name='quizprogress_user_quiz_uniq'),
+        ]
+        indexes = [
+            # Quizzes a user completed within a period
+            models.Index(fields=['user', 'completed_at'], name='quizprogress_user_done_idx'),
+        ]
+    
+    target = 'quiz'
+    path_lookup = 'topic__learning_journey__learning_path'
 
 class UserActivity(models.Model):
     """Model to track user activity for calculating streaks"""
@@ -117,38 +304,27 @@ class UserActivity(models.Model):
         
     @classmethod
     def record_activity(cls, user):
-        """Record user activity for today"""
-        today = timezone.now().date()
-        cls.objects.get_or_create(user=user, date=today)
+        """Record user activity for today.
+
+        Calls are coalesced in-process by the activity recorder, so only the
+        first call per user and day reaches the database.
+        """
+        from .activity import activity_recorder
+        activity_recorder.record(user)
+
+    @classmethod
+    async def arecord_activity(cls, user):
+        """Async ``record_activity``"""
+        from .activity import activity_recorder
+        await activity_recorder.arecord(user)
     
     @classmethod
     def get_streak(cls, user):
-        """Calculate current streak of consecutive days with activity"""
-        today = timezone.now().date()
-        
-        # Get all user activities ordered by date
-        activities = cls.objects.filter(user=user).order_by('-date')
-        
-        if not activities:
-            return 0
-            
-        # Check if user was active today
-        if activities.first().date != today:
+        """Get current streak of consecutive days with activity"""
+        try:
+            return user.stats.get_streak()
+        except UserStats.DoesNotExist:
             return 0
-            
-        # Count consecutive days
-        streak = 1
-        for i in range(1, activities.count()):
-            prev_date = activities[i-1].date
-            curr_date = activities[i].date
-            
-            # If dates are consecutive
-            if prev_date - curr_date == timedelta(days=1):
-                streak += 1
-            else:
-                break
-                
-        return streak
 
 class UserStats(models.Model):
     """Model to store user statistics for dashboard"""
@@ -156,37 +332,81 @@ class UserStats(models.Model):
     courses_completed = models.IntegerField(default=0)
     quizzes_taken = models.IntegerField(default=0)
     overall_progress = models.IntegerField(default=0)  # Percentage
+    current_streak = models.IntegerField(default=0)  # Consecutive active days ending at last_active_date
+    longest_streak = models.IntegerField(default=0)
+    last_active_date = models.DateField(null=True, blank=True)
     
     def __str__(self):
         return f"Stats for {self.user.username}"
     
+    @classmethod
+    def record_active_days(cls, day, user_ids):
+        """Extend or restart the streaks of users newly active on ``day`` in one UPDATE.
+
+        Recording the same day twice is a no-op, so callers that cannot tell
+        whether the activity row was new may call this unconditionally.
+        """
+        user_ids = set(user_ids)
+        streak = Case(
+            When(last_active_date=day, then=F('current_streak')),
+            When(last_active_date=day - timedelta(days=1), then=F('current_streak') + 1),
+            default=Value(1),
+        )
+        updated = cls.objects.filter(user_id__in=user_ids).exclude(last_active_date__gt=day).update(
+            current_streak=streak,
+            longest_streak=Greatest(F('longest_streak'), streak),
+            last_active_date=day,
+        )
+        if updated < len(user_ids):
+            existing = set(cls.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+            cls.objects.bulk_create(
+                [
+                    cls(user_id=user_id, current_streak=1, longest_streak=1, last_active_date=day)
+                    for user_id in user_ids - existing
+                ],
+                ignore_conflicts=True
+            )
+    
+    def get_streak(self):
+        """Get current streak, which is only live if the user was active today"""
+        if self.last_active_date != timezone.now().date():
+            return 0
+        return self.current_streak
+    
     def update_stats(self):
-        """Update user statistics based on their activity"""
-        # Count completed courses (learning journeys)
-        completed_journeys = LearningJourney.objects.filter(
-            user=self.user, 
-            progress=100
-        ).count()
+        """Update user statistics based on their activity.
+
+        Journeys of the paths the user is enrolled in are read with their
+        completed topic counts in one query, completed quizzes in another, and
+        the row is only written when something changed. Returns True if the
+        stats were saved.
+        """
+        completed_topics = TopicProgress.objects.completed().filter(
+            user=self.user_id, topic__learning_journey=OuterRef('pk')
+        ).order_by().values('topic__learning_journey')
+        journeys = LearningJourney.objects.filter(learning_path__enrollments__user=self.user_id).annotate(
+            completed=Coalesce(Subquery(completed_topics.annotate(n=Count('id')).values('n')), 0)
+        ).values_list('total_lessons', 'completed')
         
-        # Count completed quizzes
-        completed_quizzes = Quiz.objects.filter(
-            topic__learning_journey__user=self.user,
-            is_completed=True
-        ).count()
+        progress = [completed * 100 // total if total > 0 else 0 for total, completed in journeys]
+        
+        # Count completed courses (learning journeys) and quizzes
+        courses_completed = progress.count(100)
+        quizzes_taken = QuizProgress.objects.completed().filter(user=self.user_id).count()
         
         # Calculate overall progress
-        journeys = LearningJourney.objects.filter(user=self.user)
-        if journeys.exists():
-            total_progress = sum(journey.progress for journey in journeys)
-            avg_progress = total_progress // journeys.count()
-        else:
-            avg_progress = 0
+        avg_progress = sum(progress) // len(progress) if progress else 0
+        
+        stored = (self.courses_completed, self.quizzes_taken, self.overall_progress)
+        if stored == (courses_completed, quizzes_taken, avg_progress):
+            return False
         
         # Update the stats
-        self.courses_completed = completed_journeys
-        self.quizzes_taken = completed_quizzes
+        self.courses_completed = courses_completed
+        self.quizzes_taken = quizzes_taken
         self.overall_progress = avg_progress
-        self.save()
+        self.save(update_fields=['courses_completed', 'quizzes_taken', 'overall_progress'])
+        return True
     
     def get_courses_completed_this_month(self):
         """Get number of courses completed this month"""
@@ -194,9 +414,8 @@ class UserStats(models.Model):
         
         # Count topics that were completed this month
         # We use topics as a proxy for "courses" since they're the actual content units
-        return Topic.objects.filter(
-            learning_journey__user=self.user,
-            is_completed=True,
+        return TopicProgress.objects.completed().filter(
+            user=self.user_id,
             completed_at__gte=first_day_of_month
         ).count()
     
@@ -207,9 +426,8 @@ class UserStats(models.Model):
         start_of_week = today - timedelta(days=today.weekday())
         start_of_week = timezone.datetime.combine(start_of_week, timezone.datetime.min.time())
         
-        return Quiz.objects.filter(
-            topic__learning_journey__user=self.user,
-            is_completed=True,
+        return QuizProgress.objects.completed().filter(
+            user=self.user_id,
             completed_at__gte=start_of_week
         ).count()
 
@@ -222,8 +440,24 @@ class QuizResult(models.Model):
     score = models.IntegerField()  # Score as a percentage (0-100)
     date_taken = models.DateField(default=timezone.now)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date_taken'], name='quizresult_user_date_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.user.username} - {self.quiz.title} - {self.score}%"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored result so an update can replace its ranking weight
+        if 'score' in field_names and 'date_taken' in field_names:
+            instance._stored_result = (
+                values[field_names.index('score')],
+                values[field_names.index('date_taken')],
+            )
+        return instance
 
 class LearningInsight(models.Model):
     """Model to store AI-generated learning insights"""
@@ -237,9 +471,344 @@ class LearningInsight(models.Model):
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'insight_type'], name='insight_user_type_idx'),
+            models.Index(fields=['user', 'created_at'], name='insight_user_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.user.username} - {self.get_insight_type_display()}"
 
+class PathRanking(models.Model):
+    """
+    Popularity counters and score for a learning path, kept current by
+    small deltas as enrollments, topics, progress and quiz results change.
+
+    The score combines enrollments, the share of the enrolled users' lessons
+    that have been completed, and the time-decayed average of quiz scores on the path.
+    Quiz results are weighted by 2 ** (days since quiz_epoch / half-life), so
+    the weighted average decays without rewriting old rows: newer results
+    simply carry exponentially more weight. Before the weights grow large
+    enough to overflow, the epoch moves forward and both sums are scaled
+    down by the same factor, which leaves the average unchanged.
+    """
+    learning_path = models.OneToOneField(
+        LearningPath, on_delete=models.CASCADE, primary_key=True, related_name='ranking'
+    )
+    enrollments = models.IntegerField(default=0)
+    total_lessons = models.IntegerField(default=0)  # Lessons in the path
+    completed_lessons = models.IntegerField(default=0)  # Completed by all users together
+    quiz_score_sum = models.FloatField(default=0)  # Sum of score * weight
+    quiz_weight_sum = models.FloatField(default=0)  # Sum of weight
+    quiz_epoch = models.DateField(default=timezone.localdate)  # Day on which a quiz result weighs 1
+    score = models.FloatField(default=0)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['score', 'learning_path'], name='ranking_score_idx'),
+        ]
+    
+    RESCALE_HALF_LIVES = 64  # Move the epoch once new weights would exceed 2 ** 64
+    ENROLLMENT_WEIGHT = 1.0
+    COMPLETION_WEIGHT = 2.0
+    QUIZ_WEIGHT = 1.0
+    
+    def __str__(self):
+        return f"Ranking for {self.learning_path_id}: {self.score:.3f}"
+    
+    @staticmethod
+    def half_lives(day, epoch):
+        """Ranking half-lives from ``epoch`` to ``day``"""
+        if isinstance(day, datetime):
+            day = day.date()
+        return (day - epoch).days / getattr(settings, 'RANKING_HALF_LIFE_DAYS', 30)
+    
+    @classmethod
+    def quiz_weight(cls, day, epoch):
+        """Decay weight of a quiz result taken on ``day``, relative to ``epoch``"""
+        return 2 ** cls.half_lives(day, epoch)
+    
+    @classmethod
+    def score_expression(cls, enrollments, total_lessons, completed_lessons, quiz_score_sum, quiz_weight_sum):
+        completion_rate = Cast(completed_lessons, models.FloatField()) / NullIf(total_lessons * enrollments, 0)
+        quiz_average = quiz_score_sum / NullIf(quiz_weight_sum, 0.0) / 100
+        return (
+            cls.ENROLLMENT_WEIGHT * Ln(Cast(enrollments, models.FloatField()) + 1)
+            + cls.COMPLETION_WEIGHT * Coalesce(completion_rate, 0.0)
+            + cls.QUIZ_WEIGHT * Coalesce(quiz_average, 0.0)
+        )
+    
+    @classmethod
+    def apply_delta(cls, path_id, enrollments=0, total_lessons=0, completed_lessons=0,
+                    quiz_score=0.0, quiz_weight=0.0, quiz_epoch=None):
+        """
+        Apply counter deltas to a path and rescore it in one UPDATE. With
+        ``quiz_epoch``, the row is only updated if its epoch has not moved.
+        Returns the number of rows updated.
+        """
+        if not (enrollments or total_lessons or completed_lessons or quiz_weight):
+            return 0
+        counters = {
+            'enrollments': F('enrollments') + enrollments,
+            'total_lessons': F('total_lessons') + total_lessons,
+            'completed_lessons': F('completed_lessons') + completed_lessons,
+            'quiz_score_sum': F('quiz_score_sum') + quiz_score,
+            'quiz_weight_sum': F('quiz_weight_sum') + quiz_weight,
+        }
+        rankings = cls.objects.filter(pk=path_id)
+        if quiz_epoch is not None:
+            rankings = rankings.filter(quiz_epoch=quiz_epoch)
+        return rankings.update(score=cls.score_expression(**counters), **counters)
+    
+    @classmethod
+    def move_epoch(cls, path_id, epoch, new_epoch):
+        """Rescale a path's quiz sums from ``epoch`` to ``new_epoch``, unless its epoch has already moved"""
+        factor = 2 ** -cls.half_lives(new_epoch, epoch)
+        cls.objects.filter(pk=path_id, quiz_epoch=epoch).update(
+            quiz_score_sum=F('quiz_score_sum') * factor,
+            quiz_weight_sum=F('quiz_weight_sum') * factor,
+            quiz_epoch=new_epoch,
+        )
+    
+    @classmethod
+    def apply_quiz_result(cls, quiz_id, score, day, sign=1):
+        """Add (or with sign=-1, remove) one quiz result from its path's ranking"""
+        if isinstance(day, datetime):
+            day = day.date()
+        while True:
+            ranking = cls.objects.filter(learning_path__journeys__topics__quizzes=quiz_id).values_list(
+                'pk', 'quiz_epoch'
+            ).first()
+            if ranking is None:
+                return
+            path_id, epoch = ranking
+            if cls.half_lives(day, epoch) > cls.RESCALE_HALF_LIVES:
+                cls.move_epoch(path_id, epoch, day)
+                continue
+            weight = cls.quiz_weight(day, epoch)
+            # Another writer may have moved the epoch since it was read; start over if so
+            if cls.apply_delta(path_id, quiz_score=sign * score * weight, quiz_weight=sign * weight, quiz_epoch=epoch):
+                return
+    
+    @classmethod
+    def rebuild(cls, path_id):
+        """Recompute a path's counters from scratch (repair path)"""
+        counts = LearningJourney.objects.filter(learning_path_id=path_id).aggregate(
+            total_lessons=Coalesce(Sum('total_lessons'), 0),
+        )
+        counts['enrollments'] = Enrollment.objects.filter(learning_path_id=path_id).count()
+        counts['completed_lessons'] = TopicProgress.objects.completed().filter(
+            topic__learning_journey__learning_path_id=path_id
+        ).count()
+        # Rebuilt sums start from a fresh epoch, so weights are at most 1
+        quiz_epoch = timezone.now().date()
+        quiz_score_sum = quiz_weight_sum = 0.0
+        results = QuizResult.objects.filter(
+            quiz__topic__learning_journey__learning_path_id=path_id
+        ).values_list('score', 'date_taken')
+        for score, day in results.iterator():
+            weight = cls.quiz_weight(day, quiz_epoch)
+            quiz_score_sum += score * weight
+            quiz_weight_sum += weight
+        
+        cls.objects.update_or_create(
+            learning_path_id=path_id,
+            defaults=dict(counts, quiz_score_sum=quiz_score_sum, quiz_weight_sum=quiz_weight_sum, quiz_epoch=quiz_epoch),
+        )
+        counters = {field: F(field) for field in (
+            'enrollments', 'total_lessons', 'completed_lessons', 'quiz_score_sum', 'quiz_weight_sum'
+        )}
+        cls.objects.filter(pk=path_id).update(score=cls.score_expression(**counters))
+
+class GenerationJob(models.Model):
+    """
+    A queued learning path generation, run by the run_generation_worker command.
+
+    Workers claim a job with a conditional UPDATE that sets a lease. A job whose
+    lease expires (the worker died) becomes claimable again until it has been
+    attempted MAX_ATTEMPTS times. Results are only recorded by the worker that
+    still holds the lease.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    )
+    MAX_ATTEMPTS = 3
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='generation_jobs')
+    params = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    learning_path = models.ForeignKey(LearningPath, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveIntegerField(default=0)
+    lease_owner = models.CharField(max_length=100, blank=True, default='')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'lease_expires_at'], name='genjob_status_lease_idx'),
+        ]
+
+    def __str__(self):
+        return f"Generation job {self.pk} ({self.status})"
+
+    @classmethod
+    def claim(cls, worker_id, lease_seconds=300):
+        """Lease the oldest runnable job to ``worker_id`` and return it, or None if there is none"""
+        now = timezone.now()
+        # Give up on jobs that keep losing their worker
+        cls.objects.filter(
+            status=cls.RUNNING, lease_expires_at__lt=now, attempts__gte=cls.MAX_ATTEMPTS
+        ).update(status=cls.FAILED, error="Worker lease expired too many times", finished_at=now, updated_at=now)
+
+        runnable = Q(status=cls.PENDING) | Q(status=cls.RUNNING, lease_expires_at__lt=now)
+        while True:
+            job_id = cls.objects.filter(runnable).order_by('id').values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+            claimed = cls.objects.filter(runnable, pk=job_id).update(
+                status=cls.RUNNING,
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=F('attempts') + 1,
+                updated_at=now
+            )
+            if claimed:
+                return cls.objects.get(pk=job_id)
+            # Another worker claimed it first, try the next one
+
+    def finish(self, **fields):
+        """Record an outcome if this worker still holds the lease. Returns False if the job was lost."""
+        now = timezone.now()
+        fields.setdefault('finished_at', now)
+        updated = GenerationJob.objects.filter(
+            pk=self.pk, status=self.RUNNING, lease_owner=self.lease_owner
+        ).update(lease_expires_at=None, updated_at=now, **fields)
+        return updated == 1
+
+    def succeed(self, learning_path):
+        return self.finish(status=self.SUCCEEDED, learning_path=learning_path, error='')
+
+    def fail(self, error):
+        """Mark the job failed, or put it back in the queue while it has attempts left"""
+        if self.attempts < self.MAX_ATTEMPTS:
+            return self.finish(status=self.PENDING, error=error, lease_owner='', finished_at=None)
+        return self.finish(status=self.FAILED, error=error)
+
+class SkillTemplate(models.Model):
+    """
+    A fallback journey template for skills matching ``key`` or one of its
+    ``synonyms``. Overrides the built-in template with the same key.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    synonyms = models.JSONField(default=list, blank=True)
+    journey = models.JSONField(help_text='{"title", "description", "topics": [{"title", "description", "duration", "quizzes": [...]}]}')
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.key
+
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        if not isinstance(self.synonyms, list) or not all(isinstance(s, str) for s in self.synonyms):
+            raise ValidationError({'synonyms': 'Expected a list of strings.'})
+        journey = self.journey if isinstance(self.journey, dict) else {}
+        topic_keys = ('title', 'description', 'duration', 'quizzes')
+        quiz_keys = ('title', 'description', 'duration', 'difficulty', 'questions_count')
+        valid = (
+            all(key in journey for key in ('title', 'description', 'topics'))
+            and all(
+                isinstance(topic, dict) and all(key in topic for key in topic_keys)
+                and all(isinstance(quiz, dict) and all(key in quiz for key in quiz_keys) for quiz in topic['quizzes'])
+                for topic in journey['topics']
+            )
+        )
+        if not valid:
+            raise ValidationError({'journey': 'Journey must have a title, description and topics with quizzes.'})
+
+# Signals to keep path rankings current
+@receiver(post_save, sender=LearningPath)
+def create_path_ranking(sender, instance, created, **kwargs):
+    if created:
+        PathRanking.objects.create(learning_path=instance)
+
+@receiver(post_save, sender=LearningJourney)
+def journey_ranking_saved(sender, instance, created, **kwargs):
+    if created:
+        PathRanking.apply_delta(instance.learning_path_id, total_lessons=instance.total_lessons)
+
+@receiver(pre_delete, sender=LearningJourney)
+def journey_ranking_deleting(sender, instance, **kwargs):
+    # Progress rows go with the topics, so count them while they still exist
+    instance._completed_lessons = TopicProgress.objects.completed().filter(
+        topic__learning_journey=instance
+    ).count()
+
+@receiver(post_delete, sender=LearningJourney)
+def journey_ranking_deleted(sender, instance, **kwargs):
+    PathRanking.apply_delta(
+        instance.learning_path_id,
+        total_lessons=-instance.total_lessons,
+        completed_lessons=-getattr(instance, '_completed_lessons', 0),
+    )
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_ranking_saved(sender, instance, created, **kwargs):
+    if created:
+        PathRanking.apply_delta(instance.learning_path_id, enrollments=1)
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_ranking_deleted(sender, instance, **kwargs):
+    PathRanking.apply_delta(instance.learning_path_id, enrollments=-1)
+
+@receiver(post_save, sender=QuizResult)
+def quiz_result_ranking_saved(sender, instance, created, **kwargs):
+    stored = getattr(instance, '_stored_result', None)
+    if stored is not None:
+        PathRanking.apply_quiz_result(instance.quiz_id, *stored, sign=-1)
+    PathRanking.apply_quiz_result(instance.quiz_id, instance.score, instance.date_taken)
+    instance._stored_result = (instance.score, instance.date_taken)
+
+@receiver(post_delete, sender=QuizResult)
+def quiz_result_ranking_deleted(sender, instance, **kwargs):
+    stored = getattr(instance, '_stored_result', (instance.score, instance.date_taken))
+    PathRanking.apply_quiz_result(instance.quiz_id, *stored, sign=-1)
+
+# Signals to invalidate cached path trees when their content changes
+@receiver(post_save, sender=LearningPath)
+def path_tree_changed(sender, instance, created, **kwargs):
+    if not created:
+        LearningPath.bump_tree_version(pk=instance.pk)
+
+@receiver([post_save, post_delete], sender=LearningJourney)
+def journey_tree_changed(sender, instance, **kwargs):
+    LearningPath.bump_tree_version(pk=instance.learning_path_id)
+
+@receiver([post_save, post_delete], sender=Topic)
+def topic_tree_changed(sender, instance, **kwargs):
+    LearningPath.bump_tree_version(journeys=instance.learning_journey_id)
+
+@receiver([post_save, post_delete], sender=Quiz)
+def quiz_tree_changed(sender, instance, **kwargs):
+    LearningPath.bump_tree_version(journeys__topics=instance.topic_id)
+
+# Signal to reload the fallback skill templates when they change
+@receiver([post_save, post_delete], sender=SkillTemplate)
+def skill_template_changed(sender, instance, **kwargs):
+    from .skill_templates import skill_template_registry
+    skill_template_registry.invalidate()
+
 # Signal to create user profile when a new user is created
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
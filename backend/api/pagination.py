@@ -0,0 +1,98 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Pages are selected with a ``WHERE (date, id) > cursor`` style filter on an
+indexed ordering instead of an OFFSET, so every page costs the same no matter
+how deep into the table it is. The response body keeps the plain list shape
+the endpoints always had; the next page is advertised in a ``Link`` header.
+Requests without a ``limit`` or ``cursor`` get the whole list, as they did
+before the endpoints were paginated.
+"""
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = 50  # When a cursor is given without a limit
+    max_page_size = 200
+    # A date/datetime field followed by 'id', both in the same direction
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = ordering
+        self.descending = self.ordering[0].startswith('-')
+        self.key_field = self.ordering[0].lstrip('-')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.next_item = None
+        queryset = queryset.order_by(*self.ordering)
+        params = request.query_params
+        if self.limit_query_param not in params and self.cursor_query_param not in params:
+            return list(queryset)
+
+        limit = self.get_limit(request)
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            key, pk = self.decode_cursor(cursor, queryset.model)
+            lookup = 'lt' if self.descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.key_field}__{lookup}': key})
+                | Q(**{self.key_field: key, f'id__{lookup}': pk})
+            )
+
+        # Fetch one extra row to learn whether there is a next page
+        page = list(queryset[:limit + 1])
+        self.next_item = page[limit - 1] if len(page) > limit else None
+        return page[:limit]
+
+    def get_paginated_response(self, data):
+        response = Response(data)
+        next_link = self.get_next_link()
+        if next_link:
+            response['Link'] = f'<{next_link}>; rel="next"'
+        return response
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(limit, self.max_page_size))
+
+    def get_next_link(self):
+        if self.next_item is None:
+            return None
+        key = getattr(self.next_item, self.key_field)
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(key, self.next_item.pk))
+
+    def encode_cursor(self, key, pk):
+        raw = json.dumps([key.isoformat(), pk]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(self, cursor, model):
+        try:
+            key, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if model._meta.get_field(self.key_field).get_internal_type() == 'DateField':
+                key = parse_date(key)
+            else:
+                key = parse_datetime(key)
+            pk = int(pk)
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if key is None:
+            raise NotFound(self.invalid_cursor_message)
+        return key, pk
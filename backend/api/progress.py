@@ -0,0 +1,69 @@
+"""
+Per-user progress on shared learning path content.
+
+Journeys, topics and quizzes are shared by every user enrolled in a path.
+What a user has done is kept in TopicProgress and QuizProgress, and the
+per-user journey fields (``completed_lessons``, ``progress`` and
+``next_lesson``) are derived from those rows when a tree is rendered.
+"""
+from .models import LearningJourney, Topic, TopicProgress, QuizProgress
+
+
+class UserProgress:
+    """
+    The topics and quizzes one user has completed, loaded for a path or a set
+    of journeys with one indexed query per progress table.
+    """
+    JOURNEY_FIELDS = ('completed_lessons', 'progress', 'next_lesson')
+
+    def __init__(self, topic_ids=(), quiz_ids=()):
+        self.topic_ids = frozenset(topic_ids)
+        self.quiz_ids = frozenset(quiz_ids)
+
+    @classmethod
+    def load(cls, user, **lookup):
+        """Progress of ``user`` on the topics matching ``lookup``, e.g. ``learning_journey_id=pk``"""
+        topic_ids = TopicProgress.objects.completed().filter(
+            user=user, **{f'topic__{key}': value for key, value in lookup.items()}
+        ).values_list('topic_id', flat=True)
+        quiz_ids = QuizProgress.objects.completed().filter(
+            user=user, **{f'quiz__topic__{key}': value for key, value in lookup.items()}
+        ).values_list('quiz_id', flat=True)
+        return cls(topic_ids, quiz_ids)
+
+    def journey(self, total_lessons, topics):
+        """Per-user journey fields given the journey's ``(id, title)`` topics in order"""
+        topics = list(topics)
+        completed = sum(1 for topic_id, title in topics if topic_id in self.topic_ids)
+        if topics:
+            next_lesson = next(
+                (title for topic_id, title in topics if topic_id not in self.topic_ids),
+                LearningJourney.ALL_COMPLETED
+            )
+        else:
+            next_lesson = None
+        return {
+            'completed_lessons': completed,
+            'progress': completed * 100 // total_lessons if total_lessons > 0 else 0,
+            'next_lesson': next_lesson,
+        }
+
+
+NO_PROGRESS = UserProgress()
+
+
+def journey_progress(user, journey_ids):
+    """Progress summaries of ``user`` on the given journeys, ordered by id"""
+    journeys = list(
+        LearningJourney.objects.filter(pk__in=journey_ids).order_by('id').values('id', 'total_lessons')
+    )
+    topics = {journey['id']: [] for journey in journeys}
+    rows = Topic.objects.filter(learning_journey__in=topics).order_by('order', 'id').values_list(
+        'learning_journey_id', 'id', 'title'
+    )
+    for journey_id, topic_id, title in rows:
+        topics[journey_id].append((topic_id, title))
+    progress = UserProgress.load(user, learning_journey__in=list(topics))
+    for journey in journeys:
+        journey.update(progress.journey(journey['total_lessons'], topics[journey['id']]))
+    return journeys
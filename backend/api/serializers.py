@@ -1,27 +1,73 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
-from .models import LearningPath, LearningJourney, Topic, Quiz, UserProfile, UserStats, UserActivity, QuizResult, LearningInsight
+from django.urls import reverse
+from .models import LearningPath, LearningJourney, Topic, Quiz, UserProfile, UserStats, UserActivity, QuizResult, LearningInsight, GenerationJob
+from .progress import NO_PROGRESS
+
+def user_progress(serializer):
+    """The UserProgress passed in the serializer context, if any"""
+    return serializer.context.get('progress', NO_PROGRESS)
 
 class QuizSerializer(serializers.ModelSerializer):
+    is_completed = serializers.SerializerMethodField()
+    
     class Meta:
         model = Quiz
         fields = ['id', 'title', 'description', 'duration', 'difficulty', 'questions_count', 'is_completed']
+    
+    def get_is_completed(self, obj):
+        return obj.pk in user_progress(self).quiz_ids
 
 class TopicSerializer(serializers.ModelSerializer):
+    is_completed = serializers.SerializerMethodField()
     quizzes = QuizSerializer(many=True, read_only=True)
     
     class Meta:
         model = Topic
         fields = ['id', 'title', 'description', 'order', 'duration', 'is_completed', 'quizzes']
+    
+    def get_is_completed(self, obj):
+        return obj.pk in user_progress(self).topic_ids
 
 class LearningJourneySerializer(serializers.ModelSerializer):
+    completed_lessons = serializers.SerializerMethodField()
+    progress = serializers.SerializerMethodField()
+    next_lesson = serializers.SerializerMethodField()
     topics = TopicSerializer(many=True, read_only=True)
     
     class Meta:
         model = LearningJourney
         fields = ['id', 'title', 'description', 'total_lessons', 'completed_lessons', 
                   'progress', 'next_lesson', 'topics']
+    
+    def journey_progress(self, obj):
+        topics = sorted(obj.topics.all(), key=lambda topic: (topic.order, topic.pk))
+        return user_progress(self).journey(obj.total_lessons, [(topic.pk, topic.title) for topic in topics])
+    
+    def get_completed_lessons(self, obj):
+        return self.journey_progress(obj)['completed_lessons']
+    
+    def get_progress(self, obj):
+        return self.journey_progress(obj)['progress']
+    
+    def get_next_lesson(self, obj):
+        return self.journey_progress(obj)['next_lesson']
+
+class JourneyProgressSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    total_lessons = serializers.IntegerField()
+    completed_lessons = serializers.IntegerField()
+    progress = serializers.IntegerField()
+    next_lesson = serializers.CharField(allow_null=True)
+
+class TopicCompletionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    is_completed = serializers.BooleanField()
+
+class EnrollRequestSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    usernames = serializers.ListField(child=serializers.CharField(), required=False)
 
 class LearningPathSerializer(serializers.ModelSerializer):
     journeys = LearningJourneySerializer(many=True, read_only=True)
@@ -40,6 +86,20 @@ class GeneratePathRequestSerializer(serializers.Serializer):
     study_hours = serializers.IntegerField()
     selected_skills = serializers.ListField(child=serializers.CharField())
 
+class GenerationJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.IntegerField(source='id', read_only=True)
+    learning_path_id = serializers.IntegerField(read_only=True)
+    status_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = GenerationJob
+        fields = ['job_id', 'status', 'learning_path_id', 'error', 'attempts', 'created_at', 'finished_at', 'status_url']
+    
+    def get_status_url(self, obj):
+        url = reverse('generation-job-detail', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
 # User Profile Serializer
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
@@ -66,7 +126,7 @@ class UserStatsSerializer(serializers.ModelSerializer):
         return obj.get_quizzes_taken_this_week()
     
     def get_streak(self, obj):
-        return UserActivity.get_streak(obj.user)
+        return obj.get_streak()
 
 # Add these new serializers after the existing UserStatsSerializer
 
@@ -131,8 +191,9 @@ class RegisterSerializer(serializers.ModelSerializer):
         user.set_password(validated_data['password'])
         user.save()
         
-        # Create user profile
-        UserProfile.objects.create(user=user, user_type=user_type)
+        # The post_save signal created the profile, set its type
+        user.profile.user_type = user_type
+        user.profile.save(update_fields=['user_type'])
         
         return user
 
@@ -0,0 +1,383 @@
+"""
+Journey templates for the fallback path generator.
+
+Built-in templates live in ``BUILTIN_TEMPLATES``; operators can add or
+override templates at runtime through the SkillTemplate table (Django admin).
+Every template is matched by its key and its synonyms as whole words of the
+skill name ("Intro to Machine Learning" matches "machine learning", "ML
+basics" matches its synonym "ml").
+
+``skill_template_registry`` compiles all patterns into one Aho-Corasick
+automaton, so a skill is matched in a single pass over its characters no
+matter how many templates exist. When several templates match, the one listed
+first wins: built-ins in their order, then database templates by id. The
+registry reloads after SkillTemplate changes in this process and at least
+every SKILL_TEMPLATE_RELOAD_INTERVAL seconds to pick up other processes' edits.
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError
+
+BUILTIN_TEMPLATES = {
+    "python": {
+        "title": "Python Programming Mastery",
+        "description": "Master Python programming from basics to advanced concepts",
+        "topics": [
+            {
+                "title": "Python Fundamentals",
+                "description": "Learn the core concepts of Python programming language",
+                "duration": "8 hours",
+                "quizzes": [
+                    {
+                        "title": "Python Syntax Quiz",
+                        "description": "Test your understanding of Python syntax and basic concepts",
+                        "duration": "30 minutes",
+                        "difficulty": "Beginner",
+                        "questions_count": 10
+                    }
+                ]
+            },
+            {
+                "title": "Data Structures in Python",
+                "description": "Learn about lists, dictionaries, sets, and tuples in Python",
+                "duration": "6 hours",
+                "quizzes": [
+                    {
+                        "title": "Data Structures Quiz",
+                        "description": "Test your knowledge of Python data structures",
+                        "duration": "45 minutes",
+                        "difficulty": "Intermediate",
+                        "questions_count": 15
+                    }
+                ]
+            },
+            {
+                "title": "Functions and Modules",
+                "description": "Learn how to create and use functions and modules in Python",
+                "duration": "5 hours",
+                "quizzes": [
+                    {
+                        "title": "Functions Quiz",
+                        "description": "Test your understanding of Python functions",
+                        "duration": "30 minutes",
+                        "difficulty": "Intermediate",
+                        "questions_count": 12
+                    }
+                ]
+            },
+            {
+                "title": "Object-Oriented Programming",
+                "description": "Learn OOP concepts in Python including classes and inheritance",
+                "duration": "10 hours",
+                "quizzes": [
+                    {
+                        "title": "OOP Concepts Quiz",
+                        "description": "Test your understanding of object-oriented programming in Python",
+                        "duration": "60 minutes",
+                        "difficulty": "Advanced",
+                        "questions_count": 20
+                    }
+                ]
+            }
+        ]
+    },
+    "machine learning": {
+        "title": "Machine Learning Foundations",
+        "description": "Learn the fundamentals of machine learning algorithms and applications",
+        "topics": [
+            {
+                "title": "Introduction to Machine Learning",
+                "description": "Understand the basic concepts and types of machine learning",
+                "duration": "6 hours",
+                "quizzes": [
+                    {
+                        "title": "ML Basics Quiz",
+                        "description": "Test your understanding of machine learning fundamentals",
+                        "duration": "45 minutes",
+                        "difficulty": "Beginner",
+                        "questions_count": 15
+                    }
+                ]
+            },
+            {
+                "title": "Supervised Learning Algorithms",
+                "description": "Learn about regression, classification, and decision trees",
+                "duration": "12 hours",
+                "quizzes": [
+                    {
+                        "title": "Supervised Learning Quiz",
+                        "description": "Test your knowledge of supervised learning algorithms",
+                        "duration": "60 minutes",
+                        "difficulty": "Intermediate",
+                        "questions_count": 20
+                    }
+                ]
+            },
+            {
+                "title": "Unsupervised Learning",
+                "description": "Explore clustering, dimensionality reduction, and association",
+                "duration": "10 hours",
+                "quizzes": [
+                    {
+                        "title": "Unsupervised Learning Quiz",
+                        "description": "Test your understanding of unsupervised learning techniques",
+                        "duration": "45 minutes",
+                        "difficulty": "Advanced",
+                        "questions_count": 15
+                    }
+                ]
+            }
+        ]
+    },
+    "web development": {
+        "title": "Web Development Journey",
+        "description": "Master the skills needed to build modern web applications",
+        "topics": [
+            {
+                "title": "HTML and CSS Fundamentals",
+                "description": "Learn the building blocks of web pages",
+                "duration": "8 hours",
+                "quizzes": [
+                    {
+                        "title": "HTML & CSS Quiz",
+                        "description": "Test your knowledge of HTML and CSS basics",
+                        "duration": "30 minutes",
+                        "difficulty": "Beginner",
+                        "questions_count": 15
+                    }
+                ]
+            },
+            {
+                "title": "JavaScript Essentials",
+                "description": "Learn the core concepts of JavaScript programming",
+                "duration": "10 hours",
+                "quizzes": [
+                    {
+                        "title": "JavaScript Basics Quiz",
+                        "description": "Test your understanding of JavaScript fundamentals",
+                        "duration": "45 minutes",
+                        "difficulty": "Intermediate",
+                        "questions_count": 20
+                    }
+                ]
+            },
+            {
+                "title": "Frontend Frameworks",
+                "description": "Learn popular frontend frameworks like React or Vue",
+                "duration": "15 hours",
+                "quizzes": [
+                    {
+                        "title": "Frontend Frameworks Quiz",
+                        "description": "Test your knowledge of modern frontend frameworks",
+                        "duration": "60 minutes",
+                        "difficulty": "Advanced",
+                        "questions_count": 25
+                    }
+                ]
+            },
+            {
+                "title": "Backend Development",
+                "description": "Learn server-side programming and databases",
+                "duration": "12 hours",
+                "quizzes": [
+                    {
+                        "title": "Backend Development Quiz",
+                        "description": "Test your understanding of backend concepts",
+                        "duration": "60 minutes",
+                        "difficulty": "Advanced",
+                        "questions_count": 20
+                    }
+                ]
+            }
+        ]
+    }
+}
+
+BUILTIN_SYNONYMS = {
+    "python": ["python3", "django", "flask", "pandas", "numpy"],
+    "machine learning": [
+        "ml", "ai", "artificial intelligence", "deep learning", "neural networks", "data science"
+    ],
+    "web development": [
+        "web dev", "frontend", "front end", "front-end", "backend", "back end", "back-end",
+        "full stack", "full-stack", "fullstack", "html", "css", "javascript", "react"
+    ],
+}
+
+# Default journey structure for skills not in our predefined list
+DEFAULT_JOURNEY = {
+    "title": "Learning Journey",
+    "description": "A comprehensive journey to master new skills",
+    "topics": [
+        {
+            "title": "Fundamentals",
+            "description": "Learn the core concepts and principles",
+            "duration": "8 hours",
+            "quizzes": [
+                {
+                    "title": "Fundamentals Quiz",
+                    "description": "Test your understanding of the basic concepts",
+                    "duration": "30 minutes",
+                    "difficulty": "Beginner",
+                    "questions_count": 10
+                }
+            ]
+        },
+        {
+            "title": "Intermediate Concepts",
+            "description": "Build upon the fundamentals with more advanced topics",
+            "duration": "10 hours",
+            "quizzes": [
+                {
+                    "title": "Intermediate Quiz",
+                    "description": "Test your knowledge of intermediate concepts",
+                    "duration": "45 minutes",
+                    "difficulty": "Intermediate",
+                    "questions_count": 15
+                }
+            ]
+        },
+        {
+            "title": "Advanced Applications",
+            "description": "Apply your knowledge to real-world scenarios",
+            "duration": "12 hours",
+            "quizzes": [
+                {
+                    "title": "Advanced Quiz",
+                    "description": "Test your mastery of advanced concepts",
+                    "duration": "60 minutes",
+                    "difficulty": "Advanced",
+                    "questions_count": 20
+                }
+            ]
+        }
+    ]
+}
+
+
+def _normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def _is_boundary(text, index):
+    return index < 0 or index >= len(text) or not text[index].isalnum()
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over template patterns. ``match`` returns the
+    template id with the lowest rank among whole-word matches, or None.
+    """
+
+    def __init__(self, patterns):
+        # patterns: iterable of (pattern, rank); rank doubles as the template id
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern, rank in patterns:
+            pattern = _normalize(pattern)
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append((len(pattern), rank))
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def match(self, text):
+        text = _normalize(text)
+        best = None
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, rank in self.output[state]:
+                if best is not None and rank >= best:
+                    continue
+                if _is_boundary(text, i - length) and _is_boundary(text, i + 1):
+                    best = rank
+        return best
+
+
+class SkillTemplateRegistry:
+    def __init__(self, reload_interval=300):
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._journeys = []
+        self._matcher = None
+
+    def invalidate(self):
+        """Rebuild from the built-ins and the database on next use"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _templates(self):
+        templates = {
+            key: (journey, BUILTIN_SYNONYMS.get(key, []))
+            for key, journey in BUILTIN_TEMPLATES.items()
+        }
+        from .models import SkillTemplate
+        try:
+            rows = list(SkillTemplate.objects.filter(is_active=True).order_by('id').values_list('key', 'journey', 'synonyms'))
+        except DatabaseError as e:
+            # Table not migrated yet: serve the built-ins
+            print(f"Error loading skill templates: {str(e)}")
+            rows = []
+        for key, journey, synonyms in rows:
+            # Replaces a built-in with the same key in place, otherwise appends
+            templates[_normalize(key)] = (journey, synonyms or [])
+        return templates
+
+    def _load(self):
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.reload_interval:
+                return self._matcher, self._journeys
+            templates = self._templates()
+            journeys = []
+            patterns = []
+            for rank, (key, (journey, synonyms)) in enumerate(templates.items()):
+                journeys.append(journey)
+                patterns.append((key, rank))
+                patterns.extend((synonym, rank) for synonym in synonyms)
+            self._matcher = SkillMatcher(patterns)
+            self._journeys = journeys
+            self._loaded_at = time.monotonic()
+            return self._matcher, self._journeys
+
+    def journey_for(self, skill):
+        """The template journey for ``skill``, or DEFAULT_JOURNEY"""
+        matcher, journeys = self._load()
+        rank = matcher.match(skill)
+        return DEFAULT_JOURNEY if rank is None else journeys[rank]
+
+    def journeys_for(self, skills):
+        return [self.journey_for(skill) for skill in skills]
+
+
+skill_template_registry = SkillTemplateRegistry(
+    reload_interval=getattr(settings, 'SKILL_TEMPLATE_RELOAD_INTERVAL', 300),
+)
@@ -0,0 +1,229 @@
+"""
+Synthetic datasets for load testing and profiling.
+
+``create_users`` bulk-creates the users, then ``populate_users`` fills in
+the learning paths, enrollments, progress, quiz results and activity of the
+users in one range of ids. Ranges are independent, so the create_sample_data
+command can hand them to separate worker processes.
+
+Every random choice about a user is drawn from a generator seeded with the
+dataset seed and the user's number. The same seed therefore produces the
+same dataset, however the users are split into chunks and workers.
+"""
+import random
+from collections import Counter
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    LearningPath, LearningJourney, Topic, Quiz, Enrollment, TopicProgress, QuizProgress,
+    QuizResult, UserActivity, UserProfile, UserStats, PathRanking,
+)
+
+SKILLS = [
+    "Python", "JavaScript", "Machine Learning", "Data Analysis", "Web Development",
+    "SQL", "Statistics", "Cloud Computing", "Cybersecurity", "Mobile Development",
+]
+LEVELS = ["Fundamentals", "Intermediate Concepts", "Advanced Topics", "Projects", "Best Practices"]
+DIFFICULTIES = ["Beginner", "Intermediate", "Advanced"]
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def create_users(params):
+    """Create the synthetic users and their profiles. Returns their ``(first id, last id)``."""
+    password = make_password('password')
+    first_id = last_id = None
+    for chunk in _chunks(range(params['users']), params['batch_size']):
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(username=f"{params['prefix']}{n:07d}", email=f"{params['prefix']}{n:07d}@example.com", password=password)
+                for n in chunk
+            ])
+            # bulk_create skips the signal that creates profiles
+            UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+        first_id = users[0].pk if first_id is None else first_id
+        last_id = users[-1].pk
+    return first_id, last_id
+
+
+def split_range(first_id, last_id, parts):
+    """Split an inclusive id range into up to ``parts`` half-open ranges"""
+    size = -(-(last_id - first_id + 1) // parts)
+    return [(lo, min(lo + size, last_id + 1)) for lo in range(first_id, last_id + 1, size)]
+
+
+def populate_users(id_range, params):
+    """
+    Create the content, progress, quiz results and activity of the synthetic
+    users with ids in the half-open ``id_range``. Returns row counts per model.
+    """
+    if connection.vendor == 'sqlite':
+        # Worker processes take turns writing to the same database file
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout = 60000')
+
+    users = User.objects.filter(
+        pk__gte=id_range[0], pk__lt=id_range[1], username__startswith=params['prefix']
+    ).order_by('id').values_list('id', 'username')
+    counts = Counter()
+    for chunk in _chunks(users.iterator(), params['chunk_users']):
+        with transaction.atomic():
+            counts.update(_populate_chunk(chunk, params))
+    return counts
+
+
+def _populate_chunk(users, params):
+    batch_size = params['batch_size']
+    now = timezone.now()
+    today = now.date()
+    prefix = len(params['prefix'])
+    rngs = {user_id: random.Random(f"{params['seed']}:{username[prefix:]}") for user_id, username in users}
+
+    # Content: paths owned by each user, with journeys, topics and quizzes
+    path_owners = [user_id for user_id, username in users for p in range(params['paths_per_user'])]
+    path_skills = [rngs[user_id].choice(SKILLS) for user_id in path_owners]
+    paths = LearningPath.objects.bulk_create([
+        LearningPath(
+            title=f"{skill} Learning Path", description=f"A synthetic learning path for {skill}",
+            duration=f"{rngs[user_id].randint(4, 12)} weeks", match_percentage=rngs[user_id].randint(50, 100)
+        )
+        for user_id, skill in zip(path_owners, path_skills)
+    ], batch_size=batch_size)
+
+    journey_specs = [
+        (path, user_id, skill, level)
+        for path, user_id, skill in zip(paths, path_owners, path_skills)
+        for level in LEVELS[:params['journeys_per_path']] + [
+            f"Part {i + 1}" for i in range(len(LEVELS), params['journeys_per_path'])
+        ]
+    ]
+    journeys = LearningJourney.objects.bulk_create([
+        LearningJourney(
+            title=f"{skill} {level}", description=f"{level} of {skill}", learning_path=path,
+            user_id=user_id, total_lessons=params['topics_per_journey']
+        )
+        for path, user_id, skill, level in journey_specs
+    ], batch_size=batch_size)
+
+    topic_specs = [
+        (journey, user_id, order)
+        for journey, (path, user_id, skill, level) in zip(journeys, journey_specs)
+        for order in range(1, params['topics_per_journey'] + 1)
+    ]
+    topics = Topic.objects.bulk_create([
+        Topic(
+            title=f"{journey.title}: Lesson {order}", description=f"Lesson {order} of {journey.title}",
+            learning_journey=journey, order=order, duration=f"{rngs[user_id].randint(1, 4)} hours"
+        )
+        for journey, user_id, order in topic_specs
+    ], batch_size=batch_size)
+
+    quiz_specs = [
+        (topic, user_id) for topic, (journey, user_id, order) in zip(topics, topic_specs)
+        for k in range(params['quizzes_per_topic'])
+    ]
+    quizzes = Quiz.objects.bulk_create([
+        Quiz(
+            title=f"{topic.title} Quiz", description=f"Check your understanding of {topic.title}",
+            topic=topic, duration="30 minutes", difficulty=rngs[user_id].choice(DIFFICULTIES),
+            questions_count=rngs[user_id].randint(5, 20)
+        )
+        for topic, user_id in quiz_specs
+    ], batch_size=batch_size)
+
+    Enrollment.objects.bulk_create([
+        Enrollment(user_id=user_id, learning_path=path) for path, user_id in zip(paths, path_owners)
+    ], batch_size=batch_size)
+
+    # Progress: each user has finished a share of every journey, in order
+    completion = {user_id: rngs[user_id].random() for user_id, username in users}
+    window = max(params['activity_days'] * 2, 1)
+    done_topics = [
+        (topic, user_id) for topic, (journey, user_id, order) in zip(topics, topic_specs)
+        if order <= round(completion[user_id] * params['topics_per_journey'])
+    ]
+    done_at = {topic.pk: now - timedelta(days=rngs[user_id].randrange(window)) for topic, user_id in done_topics}
+    TopicProgress.objects.bulk_create([
+        TopicProgress(user_id=user_id, topic=topic, flags=TopicProgress.COMPLETED, completed_at=done_at[topic.pk])
+        for topic, user_id in done_topics
+    ], batch_size=batch_size)
+    QuizProgress.objects.bulk_create([
+        QuizProgress(user_id=user_id, quiz=quiz, flags=QuizProgress.COMPLETED, completed_at=done_at[quiz.topic_id])
+        for quiz, (topic, user_id) in zip(quizzes, quiz_specs) if quiz.topic_id in done_at
+    ], batch_size=batch_size)
+
+    # Quiz results on a sample of each user's quizzes
+    quizzes_by_user = {}
+    for quiz, (topic, user_id) in zip(quizzes, quiz_specs):
+        quizzes_by_user.setdefault(user_id, []).append((quiz, topic.learning_journey.learning_path_id))
+    results = []
+    for user_id, owned in quizzes_by_user.items():
+        rng = rngs[user_id]
+        for quiz, path_id in rng.sample(owned, min(params['quiz_results_per_user'], len(owned))):
+            results.append((QuizResult(
+                user_id=user_id, quiz=quiz, score=rng.randint(40, 100),
+                date_taken=today - timedelta(days=rng.randrange(180))
+            ), path_id))
+    QuizResult.objects.bulk_create([result for result, path_id in results], batch_size=batch_size)
+
+    # Activity days and the streaks they add up to
+    activities, stats = [], []
+    for user_id, username in users:
+        offsets = sorted(rngs[user_id].sample(range(window), min(params['activity_days'], window)))
+        days = [today - timedelta(days=offset) for offset in offsets]
+        activities.extend(UserActivity(user_id=user_id, date=day) for day in days)
+        stats.append(UserStats(user_id=user_id, last_active_date=days[0] if days else None, **_streaks(days)))
+    UserActivity.objects.bulk_create(activities, batch_size=batch_size)
+    UserStats.objects.bulk_create(stats, batch_size=batch_size)
+
+    # Rankings: bulk_create skipped the ranking signals, so count everything once
+    completed_by_path = Counter(topic.learning_journey.learning_path_id for topic, user_id in done_topics)
+    quiz_sums = {}
+    for result, path_id in results:
+        weight = PathRanking.quiz_weight(result.date_taken, today)
+        score_sum, weight_sum = quiz_sums.get(path_id, (0.0, 0.0))
+        quiz_sums[path_id] = (score_sum + result.score * weight, weight_sum + weight)
+    lessons = params['journeys_per_path'] * params['topics_per_journey']
+    PathRanking.objects.bulk_create([
+        PathRanking(
+            learning_path=path, enrollments=1, total_lessons=lessons,
+            completed_lessons=completed_by_path[path.pk],
+            quiz_score_sum=quiz_sums.get(path.pk, (0.0, 0.0))[0],
+            quiz_weight_sum=quiz_sums.get(path.pk, (0.0, 0.0))[1], quiz_epoch=today,
+        )
+        for path in paths
+    ], batch_size=batch_size)
+    counters = {field: F(field) for field in (
+        'enrollments', 'total_lessons', 'completed_lessons', 'quiz_score_sum', 'quiz_weight_sum'
+    )}
+    for chunk in _chunks([path.pk for path in paths], batch_size):
+        PathRanking.objects.filter(pk__in=chunk).update(score=PathRanking.score_expression(**counters))
+
+    return Counter({
+        'LearningPath': len(paths), 'LearningJourney': len(journeys), 'Topic': len(topics),
+        'Quiz': len(quizzes), 'Enrollment': len(paths), 'TopicProgress': len(done_topics),
+        'QuizProgress': sum(1 for quiz in quizzes if quiz.topic_id in done_at), 'QuizResult': len(results),
+        'UserActivity': len(activities), 'UserStats': len(stats), 'PathRanking': len(paths),
+    })
+
+
+def _streaks(days):
+    """Current and longest streak of a newest-first list of distinct days"""
+    runs = []
+    for previous, day in zip([None] + days, days):
+        if previous is not None and previous - day == timedelta(days=1):
+            runs[-1] += 1
+        else:
+            runs.append(1)
+    return {'current_streak': runs[0] if runs else 0, 'longest_streak': max(runs, default=0)}
@@ -1,3 +1,1261 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .models import (
+    LearningPath, LearningJourney, Topic, Quiz, QuizResult, PathRanking, GenerationJob, SkillTemplate,
+    Enrollment, TopicProgress, QuizProgress, UserActivity, UserStats,
+)
+from .serializers import LearningPathSerializer, LearningJourneySerializer
+from .trees import render_learning_path, render_learning_journey, user_tree
+from .progress import UserProgress, journey_progress
+from .generation import (
+    generate_learning_path, generate_path_content, generation_cache_key, generation_cache_stats, materialize_learning_path,
+)
+from .llm import build_provider, get_provider, reset_provider, CircuitOpen, LLMError
+from .llm.fake import FakeProvider
+from .tutor_cache import TutorAnswerCache, tutor_answer_cache
+from .activity import ActivityRecorder, activity_recorder
+from .tutor import tutor_event_stream
+from .jsonstream import PathStreamParser, parse_path_stream
+from .pagination import KeysetPagination
+from .generation import stream_learning_path, add_journeys
+from .skill_templates import BUILTIN_TEMPLATES, DEFAULT_JOURNEY, SkillMatcher, skill_template_registry
+from . import urls as api_urls
+from .management.commands.benchmark_endpoints import compare
+
+
+def seed_learning_path(user, journeys=2, topics=3, quizzes=1):
+    """Create a small path tree, enroll ``user`` with the first topic of each journey done, and return it"""
+    path = LearningPath.objects.create(title="Path", description="Path", duration="4 weeks")
+    done_topics, done_quizzes = [], []
+    for i in range(journeys):
+        journey = LearningJourney.objects.create(
+            title=f"Journey {i+1}", description="Journey", learning_path=path, user=user
+        )
+        for j in range(topics):
+            topic = Topic.objects.create(
+                title=f"Topic {j+1}", description="Topic", learning_journey=journey,
+                order=j+1, duration="2 hours"
+            )
+            if j == 0:
+                done_topics.append(topic.pk)
+            for k in range(quizzes):
+                quiz = Quiz.objects.create(
+                    title=f"Quiz {k+1}", description="Quiz", topic=topic, duration="30 minutes",
+                    difficulty="Beginner", questions_count=10
+                )
+                if k == 0:
+                    done_quizzes.append(quiz.pk)
+    Enrollment.enroll(user, path.pk)
+    TopicProgress.set_completed(user, done_topics)
+    QuizProgress.set_completed(user, done_quizzes)
+    return path
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite specific')
+class HotPathQueryPlanTests(TestCase):
+    """The hot model queries must be served from indexes, never full table scans"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='student', password='password')
+        cls.path = seed_learning_path(cls.user)
+
+    def assertNoTableScans(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        statements = [
+            query['sql'] for query in ctx.captured_queries
+            if query['sql'].startswith(('SELECT', 'UPDATE'))
+        ]
+        self.assertTrue(statements)
+        for sql in statements:
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+            scans = [step for step in plan if step.startswith('SCAN') and 'INDEX' not in step]
+            self.assertEqual(scans, [], f'Full table scan in: {sql}\n' + '\n'.join(plan))
+
+    def test_load_progress(self):
+        self.assertNoTableScans(lambda: UserProgress.load(self.user, learning_journey__learning_path_id=self.path.pk))
+
+    def test_topic_completion(self):
+        topic = Topic.objects.filter(learning_journey__learning_path=self.path).exclude(progress__user=self.user).first()
+        self.assertNoTableScans(lambda: TopicProgress.set_completed(self.user, [topic.pk]))
+
+    def test_update_stats(self):
+        self.assertNoTableScans(self.user.stats.update_stats)
+
+    def test_courses_completed_this_month(self):
+        self.assertNoTableScans(self.user.stats.get_courses_completed_this_month)
+
+    def test_quizzes_taken_this_week(self):
+        self.assertNoTableScans(self.user.stats.get_quizzes_taken_this_week)
+
+
+class ProgressDeltaTests(TestCase):
+    """Lesson counts and completions are kept with small deltas instead of recounts"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='password')
+        self.path = seed_learning_path(self.user, journeys=1, topics=3)
+        self.journey = self.path.journeys.get()
+        self.topics = list(self.journey.topics.order_by('order'))
+
+    def lessons(self):
+        ranking = PathRanking.objects.get(pk=self.path.pk)
+        return LearningJourney.objects.get(pk=self.journey.pk).total_lessons, ranking.total_lessons, ranking.completed_lessons
+
+    def progress(self):
+        journey = journey_progress(self.user, [self.journey.pk])[0]
+        return journey['completed_lessons'], journey['progress'], journey['next_lesson']
+
+    def test_adding_and_removing_topics(self):
+        self.assertEqual(self.lessons(), (3, 3, 1))
+        Topic.objects.create(title="Topic 4", learning_journey=self.journey, order=4, duration="1 hour")
+        self.assertEqual(self.lessons(), (4, 4, 1))
+        # Removing a completed topic takes its completion with it
+        self.topics[0].delete()
+        self.assertEqual(self.lessons(), (3, 3, 0))
+
+    def test_completion_deltas(self):
+        version = lambda: Enrollment.objects.get(user=self.user).progress_version
+        before = version()
+        self.assertEqual(self.progress(), (1, 33, "Topic 2"))
+
+        self.assertEqual(TopicProgress.set_completed(self.user, [self.topics[2].pk]), [self.topics[2].pk])
+        self.assertEqual(self.progress(), (2, 66, "Topic 2"))
+        self.assertEqual(TopicProgress.set_completed(self.user, [self.topics[1].pk]), [self.topics[1].pk])
+        self.assertEqual(self.progress(), (3, 100, LearningJourney.ALL_COMPLETED))
+        self.assertEqual(self.lessons(), (3, 3, 3))
+        self.assertEqual(version(), before + 2)
+
+        # Repeating a change is a no-op
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(TopicProgress.set_completed(self.user, [self.topics[1].pk]), [])
+        self.assertFalse([query for query in ctx.captured_queries if query['sql'].startswith('UPDATE')])
+        self.assertEqual(version(), before + 2)
+
+        # Reopening a lesson makes it the next one again
+        TopicProgress.set_completed(self.user, [self.topics[0].pk], completed=False)
+        self.assertEqual(self.progress(), (2, 66, "Topic 1"))
+        self.assertEqual(self.lessons(), (3, 3, 2))
+
+    def test_rebuild_repairs_drift(self):
+        LearningJourney.objects.filter(pk=self.journey.pk).update(total_lessons=7)
+        call_command('rebuild_journey_progress', stdout=mock.Mock())
+        self.assertEqual(self.lessons()[0], 3)
+
+
+class TopicBulkUpdateTests(TestCase):
+    """The bulk completion endpoint validates the whole batch and applies it all or nothing"""
+
+    def setUp(self):
+        activity_recorder.reset()
+        owner = User.objects.create_user(username='owner', password='password')
+        self.user = User.objects.create_user(username='student', password='password')
+        self.path = seed_learning_path(owner, journeys=1, topics=3)
+        self.topics = list(Topic.objects.filter(learning_journey__learning_path=self.path).order_by('order').values_list('id', flat=True))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, data):
+        return self.client.post('/api/topics/bulk-update/', data, format='json')
+
+    def test_invalid_batches_change_nothing(self):
+        self.assertEqual(self.post({'id': self.topics[0], 'is_completed': True}).status_code, 400)
+        self.assertEqual(self.post([{'id': self.topics[0]}]).status_code, 400)
+        response = self.post([{'id': self.topics[0], 'is_completed': True}, {'id': 0, 'is_completed': True}])
+        self.assertEqual((response.status_code, response.json()['ids']), (404, [0]))
+        self.assertFalse(TopicProgress.objects.filter(user=self.user).exists())
+        self.assertFalse(Enrollment.objects.filter(user=self.user).exists())
+
+    def test_failure_rolls_back_the_batch(self):
+        set_completed = TopicProgress.set_completed.__func__
+
+        def fail_reopening(cls, user, ids, completed=True):
+            if not completed:
+                raise RuntimeError("database went away")
+            return set_completed(cls, user, ids, completed)
+
+        with mock.patch.object(TopicProgress, 'set_completed', classmethod(fail_reopening)):
+            with self.assertRaises(RuntimeError):
+                self.post([{'id': self.topics[0], 'is_completed': True}, {'id': self.topics[1], 'is_completed': False}])
+        self.assertFalse(TopicProgress.objects.filter(user=self.user).exists())
+        self.assertFalse(Enrollment.objects.filter(user=self.user).exists())
+        self.assertEqual(PathRanking.objects.get(pk=self.path.pk).completed_lessons, 1)
+
+    def test_later_entries_win(self):
+        response = self.post([
+            {'id': self.topics[0], 'is_completed': True},
+            {'id': self.topics[1], 'is_completed': True},
+            {'id': self.topics[0], 'is_completed': False},
+        ])
+        self.assertEqual(response.json()['updated'], [self.topics[1]])
+        self.assertEqual(list(TopicProgress.objects.filter(user=self.user).completed().values_list('topic_id', flat=True)), [self.topics[1]])
+        self.assertEqual(response.json()['stats']['overall_progress'], 33)
+
+
+class UserStatsTests(TestCase):
+    """update_stats derives the dashboard counters from the user's progress"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='password')
+        self.path = seed_learning_path(self.user, journeys=2, topics=3, quizzes=2)
+        self.stats = UserStats.objects.get(user=self.user)
+
+    def counters(self):
+        self.stats.refresh_from_db()
+        return self.stats.courses_completed, self.stats.quizzes_taken, self.stats.overall_progress
+
+    def test_counters(self):
+        self.assertTrue(self.stats.update_stats())
+        # One of three topics done in each journey, and one of two quizzes in every topic
+        self.assertEqual(self.counters(), (0, 6, 33))
+
+        journey = self.path.journeys.order_by('id').first()
+        TopicProgress.set_completed(self.user, journey.topics.values_list('id', flat=True))
+        QuizProgress.set_completed(self.user, Quiz.objects.filter(topic__learning_journey=journey).values_list('id', flat=True))
+        self.assertTrue(self.stats.update_stats())
+        self.assertEqual(self.counters(), (1, 9, 66))
+
+    def test_unchanged_stats_are_not_written(self):
+        self.stats.update_stats()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertFalse(self.stats.update_stats())
+        self.assertFalse([query for query in ctx.captured_queries if query['sql'].startswith('UPDATE')])
+
+
+class StreakTests(TestCase):
+    """Streaks are maintained incrementally on UserStats and can be rebuilt from UserActivity"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='password')
+        self.today = timezone.now().date()
+
+    def record(self, user, *days_ago):
+        for n in days_ago:
+            day = self.today - timedelta(days=n)
+            UserActivity.objects.get_or_create(user=user, date=day)
+            UserStats.record_active_days(day, [user.pk])
+
+    def streak(self, user=None):
+        stats = UserStats.objects.get(user=user or self.user)
+        return stats.current_streak, stats.longest_streak, stats.last_active_date
+
+    def test_consecutive_days(self):
+        self.record(self.user, 2, 1, 0)
+        self.assertEqual(self.streak(), (3, 3, self.today))
+        self.assertEqual(UserActivity.get_streak(User.objects.get(pk=self.user.pk)), 3)
+
+    def test_gap_restarts_the_streak(self):
+        self.record(self.user, 6, 5, 4, 1, 0)
+        self.assertEqual(self.streak(), (2, 3, self.today))
+
+    def test_same_day_twice(self):
+        self.record(self.user, 1, 0)
+        UserStats.record_active_days(self.today, [self.user.pk])
+        self.assertEqual(self.streak(), (2, 2, self.today))
+
+    def test_older_day_after_newer_is_ignored(self):
+        self.record(self.user, 0, 3)
+        self.assertEqual(self.streak(), (1, 1, self.today))
+
+    def test_streak_lapses_without_activity_today(self):
+        self.record(self.user, 2, 1)
+        self.assertEqual(self.streak(), (2, 2, self.today - timedelta(days=1)))
+        self.assertEqual(UserActivity.get_streak(User.objects.get(pk=self.user.pk)), 0)
+
+    def test_backfill_matches_incremental(self):
+        other = User.objects.create_user(username='other', password='password')
+        idle = User.objects.create_user(username='idle', password='password')
+        self.record(self.user, 9, 8, 7, 5, 4, 0)
+        self.record(other, 3, 2, 1)
+        incremental = [self.streak(user) for user in (self.user, other, idle)]
+        UserStats.objects.update(current_streak=0, longest_streak=0, last_active_date=None)
+        UserStats.objects.filter(user=other).delete()
+
+        call_command('backfill_streaks', stdout=mock.Mock())
+        self.assertEqual([self.streak(user) for user in (self.user, other, idle)], incremental)
+        self.assertEqual(incremental[0], (1, 3, self.today))
+
+
+class ActivityRecorderTests(TestCase):
+    """Activity is written once per user and day, directly or in buffered batches"""
+
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'student{i}') for i in range(3)]
+        self.today = timezone.now().date()
+
+    def test_repeat_calls_skip_the_database(self):
+        recorder = ActivityRecorder()
+        self.assertTrue(recorder.record(self.users[0]))
+        with self.assertNumQueries(0):
+            self.assertFalse(recorder.record(self.users[0]))
+        self.assertEqual(UserActivity.objects.filter(user=self.users[0]).count(), 1)
+        self.assertEqual(UserStats.objects.get(user=self.users[0]).last_active_date, self.today)
+
+    def test_new_day_forgets_yesterday(self):
+        recorder = ActivityRecorder()
+        recorder.record(self.users[0])
+        tomorrow = timezone.now() + timedelta(days=1)
+        with mock.patch('django.utils.timezone.now', return_value=tomorrow):
+            self.assertTrue(recorder.record(self.users[0]))
+        self.assertEqual(recorder._seen, {self.users[0].pk})
+        self.assertEqual(
+            list(UserActivity.objects.filter(user=self.users[0]).order_by('date').values_list('date', flat=True)),
+            [self.today, tomorrow.date()]
+        )
+        self.assertEqual(UserStats.objects.get(user=self.users[0]).current_streak, 2)
+
+    def test_buffered_rows_are_flushed_in_batches(self):
+        recorder = ActivityRecorder(buffer_size=3, flush_interval=60)
+        recorder.record(self.users[0])
+        recorder.record(self.users[1])
+        recorder.record(self.users[1])
+        self.assertFalse(UserActivity.objects.exists())
+        # The third new user fills the buffer
+        recorder.record(self.users[2])
+        self.assertEqual(UserActivity.objects.filter(date=self.today).count(), 3)
+        self.assertEqual(UserStats.objects.filter(last_active_date=self.today).count(), 3)
+        self.assertEqual(recorder.flush(), 0)
+
+    def test_explicit_flush(self):
+        recorder = ActivityRecorder(buffer_size=10, flush_interval=60)
+        recorder.record(self.users[0])
+        self.assertEqual(recorder.flush(), 1)
+        self.assertTrue(UserActivity.objects.filter(user=self.users[0], date=self.today).exists())
+
+
+class TreeQueryCountTests(TestCase):
+    """Rendering a path or journey tree must not issue queries per journey or topic"""
+
+    def setUp(self):
+        activity_recorder.reset()
+        cache.clear()
+        self.user = User.objects.create_user(username='student', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_path_detail_query_count_is_fixed(self):
+        small = seed_learning_path(self.user, journeys=1, topics=1)
+        large = seed_learning_path(self.user, journeys=5, topics=5, quizzes=2)
+        self.assertEqual(
+            self.count_queries(f'/api/learning-paths/{small.pk}/'),
+            self.count_queries(f'/api/learning-paths/{large.pk}/'),
+        )
+
+    def test_journey_detail_query_count_is_fixed(self):
+        small = seed_learning_path(self.user, journeys=1, topics=1).journeys.get()
+        large = seed_learning_path(self.user, journeys=1, topics=8, quizzes=2).journeys.get()
+        self.assertEqual(
+            self.count_queries(f'/api/learning-journeys/{small.pk}/'),
+            self.count_queries(f'/api/learning-journeys/{large.pk}/'),
+        )
+
+
+class TreeRendererParityTests(TestCase):
+    """The plain-dict tree renderer must match the DRF serializers exactly"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='student', password='password')
+        cls.path = seed_learning_path(cls.user, journeys=3, topics=4, quizzes=2)
+        # Cover nullable columns and topics stored out of order
+        journey = cls.path.journeys.first()
+        Topic.objects.create(title="Intro", learning_journey=journey, order=0, duration="1 hour")
+        journey.topics.filter(order=2).update(description=None)
+        LearningJourney.objects.create(title="Empty", learning_path=cls.path, user=cls.user)
+
+    def test_learning_path_parity(self):
+        expected = LearningPathSerializer(LearningPath.objects.with_tree().get(pk=self.path.pk)).data
+        self.assertEqual(json.dumps(render_learning_path(self.path.pk)), json.dumps(expected))
+
+    def test_learning_journey_parity(self):
+        for journey in LearningJourney.objects.with_tree().filter(learning_path=self.path):
+            expected = LearningJourneySerializer(journey).data
+            self.assertEqual(json.dumps(render_learning_journey(journey.pk)), json.dumps(expected))
+
+    def test_missing_path(self):
+        with self.assertRaises(LearningPath.DoesNotExist):
+            render_learning_path(0)
+
+    def test_progress_parity(self):
+        TopicProgress.set_completed(self.user, Topic.objects.filter(title="Intro").values_list('id', flat=True))
+        progress = UserProgress.load(self.user, learning_journey__learning_path_id=self.path.pk)
+        expected = LearningPathSerializer(
+            LearningPath.objects.with_tree().get(pk=self.path.pk), context={'progress': progress}
+        ).data
+        self.assertEqual(json.dumps(user_tree('path', self.path.pk, self.user)), json.dumps(expected))
+
+
+class TreeCacheTests(TestCase):
+    """Tree endpoints answer from the versioned cache and honour If-None-Match"""
+
+    def setUp(self):
+        activity_recorder.reset()
+        cache.clear()
+        self.user = User.objects.create_user(username='student', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.path = seed_learning_path(self.user)
+        self.url = f'/api/learning-paths/{self.path.pk}/'
+
+    def test_not_modified(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_tree_skips_rendering(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_progress_change_invalidates(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        topic = Topic.objects.filter(learning_journey__learning_path=self.path).exclude(progress__user=self.user).first()
+        self.client.patch(f'/api/topics/{topic.pk}/', {'is_completed': True}, format='json')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        topics = [t for j in response.json()['journeys'] for t in j['topics'] if t['id'] == topic.pk]
+        self.assertTrue(topics[0]['is_completed'])
+
+    def test_journey_detail_shares_path_version(self):
+        journey = self.path.journeys.first()
+        url = f'/api/learning-journeys/{journey.pk}/'
+        etag = self.client.get(url)['ETag']
+        Quiz.objects.filter(topic__learning_journey=journey).first().save()
+        self.assertNotEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_missing_path(self):
+        self.assertEqual(self.client.get('/api/learning-paths/0/').status_code, 404)
+
+
+class KeysetPaginationTests(TestCase):
+    """List endpoints page with a cursor in the Link header and keep their list body"""
+
+    def setUp(self):
+        activity_recorder.reset()
+        self.user = User.objects.create_user(username='student', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def follow(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.json())
+            link = response.get('Link')
+            url = link[1:link.index('>')] if link else None
+        return ids
+
+    def test_walks_every_path_newest_first(self):
+        paths = [seed_learning_path(self.user, journeys=1, topics=1) for _ in range(7)]
+        # Ties on created_at are broken by id
+        LearningPath.objects.filter(pk__in=[p.pk for p in paths[2:5]]).update(created_at=paths[2].created_at)
+        expected = list(LearningPath.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self.follow('/api/learning-paths/?limit=3'), expected)
+
+    def test_user_filter(self):
+        mine = seed_learning_path(self.user, journeys=1, topics=1)
+        other = User.objects.create_user(username='other', password='password')
+        seed_learning_path(other, journeys=1, topics=1)
+        self.assertEqual(self.follow('/api/learning-paths/?user=me'), [mine.pk])
+
+    @mock.patch.object(KeysetPagination, 'page_size', 2)
+    def test_unpaginated_without_limit_or_cursor(self):
+        paths = [seed_learning_path(self.user, journeys=1, topics=1) for _ in range(3)]
+        response = self.client.get('/api/learning-paths/')
+        self.assertEqual([item['id'] for item in response.json()], [p.pk for p in reversed(paths)])
+        self.assertIsNone(response.get('Link'))
+        self.assertEqual(len(self.client.get('/api/learning-paths/?limit=2').json()), 2)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/learning-paths/?cursor=garbage').status_code, 404)
+        self.assertEqual(self.client.get('/api/learning-paths/?created_after=soon').status_code, 400)
+
+
+class PathRankingTests(TestCase):
+    """Incremental ranking updates must agree with a full rebuild"""
+
+    def test_incremental_matches_rebuild(self):
+        user = User.objects.create_user(username='student', password='password')
+        other = User.objects.create_user(username='other', password='password')
+        path = seed_learning_path(user)
+        Enrollment.enroll(other, path.pk)
+        journey = LearningJourney.objects.create(title="Extra", learning_path=path, user=other)
+        extra = Topic.objects.create(title="Extra topic", learning_journey=journey, order=1, duration="1 hour")
+        first = Topic.objects.filter(learning_journey__learning_path=path, progress__user=user).first()
+        TopicProgress.set_completed(other, [extra.pk, first.pk])
+        TopicProgress.set_completed(user, [first.pk], completed=False)
+        quiz = Quiz.objects.filter(topic__learning_journey__learning_path=path).first()
+        QuizResult.objects.create(user=user, quiz=quiz, score=90)
+        QuizResult.objects.update_or_create(user=user, quiz=quiz, defaults={'score': 60})
+        QuizResult.objects.create(user=other, quiz=quiz, score=70)
+        Topic.objects.get(pk=extra.pk).delete()
+
+        incremental = PathRanking.objects.values().get(pk=path.pk)
+        PathRanking.rebuild(path.pk)
+        rebuilt = PathRanking.objects.values().get(pk=path.pk)
+        self.assertEqual(incremental['enrollments'], 2)
+        self.assertEqual(incremental.pop('quiz_epoch'), rebuilt.pop('quiz_epoch'))
+        for field, value in rebuilt.items():
+            self.assertAlmostEqual(incremental[field], value, delta=abs(value) * 1e-9, msg=field)
+
+    @override_settings(RANKING_HALF_LIFE_DAYS=1)
+    def test_epoch_moves_before_weights_overflow(self):
+        user = User.objects.create_user(username='student', password='password')
+        path = seed_learning_path(user)
+        quiz = Quiz.objects.filter(topic__learning_journey__learning_path=path).first()
+        PathRanking.objects.filter(pk=path.pk).update(quiz_epoch=timezone.now().date() - timedelta(days=2000))
+        QuizResult.objects.create(user=user, quiz=quiz, score=80)
+        self.assertEqual(PathRanking.objects.get(pk=path.pk).quiz_epoch, timezone.now().date())
+        later = timezone.now().date() + timedelta(days=10)
+        QuizResult.objects.create(user=User.objects.create_user(username='other'), quiz=quiz, score=40, date_taken=later)
+        ranking = PathRanking.objects.get(pk=path.pk)
+        self.assertAlmostEqual(ranking.quiz_score_sum / ranking.quiz_weight_sum, (80 + 40 * 1024) / 1025)
+        QuizResult.objects.get(date_taken=later).delete()
+
+        ranking = PathRanking.objects.get(pk=path.pk)
+        self.assertAlmostEqual(ranking.quiz_score_sum, 80)
+        self.assertAlmostEqual(ranking.quiz_weight_sum, 1)
+
+
+class UserProgressTests(TestCase):
+    """Content rows are shared; each user's progress is their own"""
+
+    def setUp(self):
+        activity_recorder.reset()
+        cache.clear()
+        self.user = User.objects.create_user(username='student', password='password')
+        self.other = User.objects.create_user(username='other', password='password')
+        self.path = seed_learning_path(self.user)
+        self.client = APIClient()
+
+    def completed_topics(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(f'/api/learning-paths/{self.path.pk}/')
+        return [t['title'] for j in response.json()['journeys'] for t in j['topics'] if t['is_completed']]
+
+    def test_enrolling_adds_one_row(self):
+        content = lambda: (Topic.objects.count(), Quiz.objects.count(), LearningPath.objects.get(pk=self.path.pk).tree_version)
+        before = content()
+        with CaptureQueriesContext(connection) as ctx:
+            Enrollment.enroll(self.other, self.path.pk)
+        inserts = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertIn('"api_enrollment"', inserts[0])
+        self.assertEqual(content(), before)
+        self.assertEqual(PathRanking.objects.get(pk=self.path.pk).enrollments, 2)
+
+    def test_progress_is_per_user(self):
+        Enrollment.enroll(self.other, self.path.pk)
+        self.assertEqual(self.completed_topics(self.user), ["Topic 1", "Topic 1"])
+        self.assertEqual(self.completed_topics(self.other), [])
+
+        topic = Topic.objects.filter(learning_journey__learning_path=self.path).order_by('id').last()
+        response = self.client.patch(f'/api/topics/{topic.pk}/', {'is_completed': True}, format='json')
+        self.assertEqual((response.json()['completed_lessons'], response.json()['next_lesson']), (1, "Topic 1"))
+        self.assertEqual(self.completed_topics(self.other), ["Topic 3"])
+        self.assertEqual(self.completed_topics(self.user), ["Topic 1", "Topic 1"])
+
+    def test_bulk_update(self):
+        self.client.force_authenticate(self.other)
+        journey = self.path.journeys.order_by('id').first()
+        topics = list(journey.topics.order_by('order').values_list('id', flat=True))
+        response = self.client.post('/api/topics/bulk-update/', [
+            {'id': topics[0], 'is_completed': True},
+            {'id': topics[1], 'is_completed': True},
+            {'id': topics[2], 'is_completed': False},
+        ], format='json')
+        self.assertEqual(response.json()['updated'], topics[:2])
+        self.assertEqual(response.json()['journeys'], [{
+            'id': journey.pk, 'total_lessons': 3, 'completed_lessons': 2, 'progress': 66, 'next_lesson': "Topic 3",
+        }])
+        # Touching a topic enrolls the user in its path
+        self.assertTrue(Enrollment.objects.filter(user=self.other, learning_path=self.path).exists())
+
+
+class EnrollmentTests(TestCase):
+    """Users are enrolled in existing paths by reference, in batches"""
+
+    def setUp(self):
+        activity_recorder.reset()
+        self.owner = User.objects.create_user(username='owner', password='password')
+        self.path = seed_learning_path(self.owner)
+        self.students = [User.objects.create_user(username=f'student{i}', password='password') for i in range(5)]
+        self.client = APIClient()
+        self.url = f'/api/learning-paths/{self.path.pk}/enroll/'
+
+    def assertRankingCurrent(self):
+        enrollments = PathRanking.objects.get(pk=self.path.pk).enrollments
+        PathRanking.rebuild(self.path.pk)
+        self.assertEqual(enrollments, PathRanking.objects.get(pk=self.path.pk).enrollments)
+
+    def test_self_enroll(self):
+        self.client.force_authenticate(self.students[0])
+        self.assertEqual(self.client.post(self.url).status_code, 201)
+        response = self.client.post(self.url)
+        self.assertEqual((response.status_code, response.json()['already_enrolled']), (200, 1))
+        # Other users can only be enrolled by staff
+        self.assertEqual(self.client.post(self.url, {'usernames': ['student1']}, format='json').status_code, 403)
+
+    def test_staff_enrolls_cohort(self):
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='password', is_staff=True))
+        response = self.client.post(self.url, {
+            'user_ids': [self.students[0].pk, 0], 'usernames': ['student1', 'student2', 'owner', 'nobody'],
+        }, format='json')
+        self.assertEqual(response.json(), {'enrolled': 3, 'already_enrolled': 1, 'missing': [0, 'nobody']})
+        self.assertEqual(Topic.objects.filter(learning_journey__learning_path=self.path).count(), 6)
+        self.assertRankingCurrent()
+
+    def test_command_batches_inserts(self):
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('enroll_users', self.path.pk, '--all', '--batch-size', '2', stdout=mock.Mock())
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)  # Five new students in chunks of two, the owner was enrolled
+        self.assertEqual(Enrollment.objects.filter(learning_path=self.path).count(), 6)
+        self.assertRankingCurrent()
+
+    def test_command_counts_each_user_once(self):
+        users = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        self.addCleanup(os.unlink, users.name)
+        with users:
+            users.write(f'student0\nstudent1\nstudent1\n{self.students[0].pk}\nowner\n')
+        out = io.StringIO()
+        call_command('enroll_users', self.path.pk, '--file', users.name, '--username', 'student0', stdout=out)
+        self.assertIn('1 users were already enrolled', out.getvalue())
+        self.assertIn('Enrolled 2 users', out.getvalue())
+
+
+class AssignJourneysTests(TestCase):
+    """Unassigned journeys are assigned in set-based chunks"""
+
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'student{i}', password='password') for i in range(4)]
+        self.paths = [LearningPath.objects.create(title=f"Path {i}", description="Path", duration="4 weeks") for i in range(2)]
+        for i in range(10):
+            LearningJourney.objects.create(title=f"Journey {i}", learning_path=self.paths[i % 2])
+
+    def owners(self):
+        return list(LearningJourney.objects.order_by('id').values_list('user__username', flat=True))
+
+    def test_round_robin_in_chunks(self):
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('assign_journeys_to_user', '--users', 'student0,student1,student2', '--chunk-size', '4', stdout=mock.Mock())
+        journey_updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "api_learningjourney"')]
+        self.assertEqual(len(journey_updates), 3)
+        self.assertEqual(self.owners(), ['student0', 'student1', 'student2'] * 3 + ['student0'])
+        self.assertEqual(Enrollment.objects.count(), 6)
+
+    def test_cohorts_keep_paths_together(self):
+        with mock.patch('builtins.open', mock.mock_open(read_data='student0,a\nstudent1,a\nstudent2,b\n')):
+            call_command('assign_journeys_to_user', '--users-file', 'cohorts.csv', '--strategy', 'cohort', stdout=mock.Mock())
+        self.assertEqual(self.owners(), ['student0', 'student2', 'student1', 'student2'] * 2 + ['student0', 'student2'])
+
+    def test_dry_run(self):
+        call_command('assign_journeys_to_user', 'student3', '--dry-run', stdout=mock.Mock())
+        self.assertEqual(set(self.owners()), {None})
+        self.assertFalse(Enrollment.objects.exists())
+
+
+class SyntheticDataTests(TestCase):
+    """create_sample_data --users builds a consistent, reproducible dataset"""
+
+    def create(self, prefix, chunk_users):
+        call_command(
+            'create_sample_data', '--users', '6', '--topics-per-journey', '4', '--chunk-users', str(chunk_users),
+            '--seed', '7', '--prefix', prefix, stdout=mock.Mock()
+        )
+        users = User.objects.filter(username__startswith=prefix).order_by('username')
+        return [
+            (
+                list(QuizResult.objects.filter(user=user).order_by('quiz__title').values_list('quiz__title', 'score', 'date_taken')),
+                TopicProgress.objects.filter(user=user).count(),
+                (user.stats.current_streak, user.stats.longest_streak, user.activities.count()),
+            )
+            for user in users
+        ]
+
+    def test_reproducible_and_consistent(self):
+        self.assertEqual(self.create('a', chunk_users=6), self.create('b', chunk_users=4))
+        self.assertEqual(LearningJourney.objects.filter(user__username='a0000000').count(), 3)
+        for ranking in PathRanking.objects.all():
+            stored = (ranking.enrollments, ranking.total_lessons, ranking.completed_lessons, ranking.score)
+            PathRanking.rebuild(ranking.pk)
+            ranking.refresh_from_db()
+            self.assertEqual(stored[:3], (ranking.enrollments, ranking.total_lessons, ranking.completed_lessons))
+            self.assertAlmostEqual(stored[3], ranking.score)
+
+
+FAKE_LLM = {'BACKEND': 'fake', 'FAILURE_THRESHOLD': 2, 'RESET_TIMEOUT': 60}
+
+
+@override_settings(LLM_PROVIDER=FAKE_LLM)
+class GenerationJobTests(TestCase):
+    """Queued generation returns 202 at once and is completed by the worker"""
+
+    def setUp(self):
+        activity_recorder.reset()
+        caches['generation'].clear()
+        reset_provider()
+        self.user = User.objects.create_user(username='student', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.payload = {
+            'target_date': (timezone.now().date() + timedelta(weeks=4)).isoformat(),
+            'study_hours': 5,
+            'selected_skills': ['Python'],
+        }
+
+    def test_async_generation(self):
+        response = self.client.post('/api/generate-learning-path/?async=1', self.payload, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(LearningPath.objects.exists())
+        status_url = response['Location']
+        self.assertEqual(self.client.get(status_url).json()['status'], GenerationJob.PENDING)
+
+        call_command('run_generation_worker', '--burst', stdout=mock.Mock())
+
+        job = self.client.get(status_url).json()
+        self.assertEqual(job['status'], GenerationJob.SUCCEEDED)
+        path = LearningPath.objects.get(pk=job['learning_path_id'])
+        self.assertEqual(path.title, "Fake path")
+        self.assertEqual(path.journeys.filter(user=self.user).count(), 2)
+
+    def test_unstorable_answer_falls_back(self):
+        answer = FakeProvider().learning_path()
+        answer['journeys'][0]['topics'][0]['quizzes'][0]['questions_count'] = 'ten'
+        caches['generation'].set(generation_cache_key(['Python'], 5, 4), answer)
+        job = GenerationJob.objects.create(user=self.user, params=self.payload)
+
+        call_command('run_generation_worker', '--burst', stdout=mock.Mock())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (GenerationJob.SUCCEEDED, 1))
+        self.assertEqual(job.learning_path.title, 'Learning Path for Python')
+        self.assertEqual(LearningPath.objects.count(), 1)
+
+    def test_sync_generation(self):
+        response = self.client.post('/api/generate-learning-path/', self.payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['title'], "Fake path")
+
+    def test_claim_and_lease_expiry(self):
+        job = GenerationJob.objects.create(user=self.user, params=self.payload)
+        self.assertEqual(GenerationJob.claim('a').pk, job.pk)
+        self.assertIsNone(GenerationJob.claim('b'))
+
+        GenerationJob.objects.filter(pk=job.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        reclaimed = GenerationJob.claim('b')
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (job.pk, 2))
+        # The first worker lost its lease and may no longer record a result
+        self.assertFalse(job.finish(status=GenerationJob.SUCCEEDED))
+        self.assertTrue(reclaimed.finish(status=GenerationJob.SUCCEEDED))
+
+    def test_other_users_job_is_hidden(self):
+        other = User.objects.create_user(username='other', password='password')
+        job = GenerationJob.objects.create(user=other, params=self.payload)
+        self.assertEqual(self.client.get(f'/api/generation-jobs/{job.pk}/').status_code, 404)
+
+
+@override_settings(LLM_PROVIDER=FAKE_LLM)
+class GenerationCacheTests(TestCase):
+    """Equivalent generation requests share one model call"""
+
+    def setUp(self):
+        caches['generation'].clear()
+        reset_provider()
+        generation_cache_stats.reset()
+
+    def generate(self, skills, hours, weeks):
+        target_date = timezone.now().date() + timedelta(weeks=weeks)
+        return generate_path_content(target_date, hours, skills)
+
+    def test_normalized_requests_hit(self):
+        first = self.generate(['Python', 'SQL'], 5, 4)
+        second = self.generate(['sql', ' python', 'Python'], 6, 4)
+        self.assertEqual(get_provider().calls, 1)
+        self.assertEqual(first['title'], second['title'])
+        stats = generation_cache_stats.snapshot()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_different_weeks_or_hours_miss(self):
+        self.generate(['Python'], 5, 4)
+        self.generate(['Python'], 5, 8)
+        self.generate(['Python'], 20, 4)
+        self.assertEqual(get_provider().calls, 3)
+
+
+class MaterializeTests(TestCase):
+    """Generated paths are stored with a few bulk inserts, all or nothing"""
+
+    def setUp(self):
+        caches['generation'].clear()
+        self.user = User.objects.create_user(username='student', password='password')
+
+    def content(self, journeys, topics, questions_count=10):
+        return {
+            'title': 'Path', 'description': '', 'duration': '4 weeks', 'match_percentage': 90,
+            'journeys': [{
+                'title': f'Journey {i}', 'description': '',
+                'topics': [{
+                    'title': f'Topic {j}', 'description': '', 'duration': '1 hour',
+                    'quizzes': [{
+                        'title': 'Quiz', 'description': '', 'duration': '30 minutes',
+                        'difficulty': 'Beginner', 'questions_count': questions_count,
+                    }],
+                } for j in range(topics)],
+            } for i in range(journeys)],
+        }
+
+    def test_queries_do_not_grow_with_the_tree(self):
+        with CaptureQueriesContext(connection) as small:
+            materialize_learning_path(self.user, **self.content(1, 1))
+        with CaptureQueriesContext(connection) as large:
+            path = materialize_learning_path(self.user, **self.content(5, 10))
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(Quiz.objects.filter(topic__learning_journey__learning_path=path).count(), 50)
+
+    def test_bad_content_stores_nothing(self):
+        with self.assertRaises(ValueError):
+            materialize_learning_path(self.user, **self.content(2, 2, questions_count='ten'))
+        self.assertFalse(LearningPath.objects.exists())
+        self.assertFalse(Topic.objects.exists())
+
+    @override_settings(LLM_PROVIDER=FAKE_LLM)
+    def test_unstorable_cached_answer_falls_back(self):
+        reset_provider()
+        target_date = timezone.now().date() + timedelta(weeks=4)
+        answer = FakeProvider().learning_path()
+        answer['journeys'][0]['topics'][0]['quizzes'][0]['questions_count'] = 'ten'
+        caches['generation'].set(generation_cache_key(['Python'], 5, 4), answer)
+        path = generate_learning_path(self.user, target_date, 5, ['Python'])
+        self.assertEqual(path.title, 'Learning Path for Python')
+        self.assertEqual(LearningPath.objects.get().pk, path.pk)
+        self.assertTrue(path.journeys.exists())
+        self.assertEqual(get_provider().calls, 0)
+        # The unstorable answer is not served again
+        self.assertIsNone(caches['generation'].get(generation_cache_key(['Python'], 5, 4)))
+        self.assertEqual(generate_learning_path(self.user, target_date, 5, ['Python']).title, 'Fake path')
+
+
+class CircuitBreakerTests(TestCase):
+    """A failing provider is short-circuited and the callers fall back"""
+
+    def test_opens_after_threshold_and_recovers(self):
+        provider = FakeProvider(failure_rate=1.0, failure_threshold=2, reset_timeout=0.05)
+        for _ in range(2):
+            with self.assertRaises(LLMError):
+                provider.generate("question")
+        with self.assertRaises(CircuitOpen):
+            provider.generate("question")
+        self.assertEqual(provider.calls, 2)
+
+        time.sleep(0.05)
+        provider.failure_rate = 0.0
+        self.assertTrue(provider.generate("question"))
+        self.assertEqual(provider.breaker.state, provider.breaker.CLOSED)
+
+    def half_open(self):
+        provider = FakeProvider(failure_rate=1.0, failure_threshold=1, reset_timeout=0.05)
+        with self.assertRaises(LLMError):
+            provider.generate("question")
+        time.sleep(0.05)
+        provider.failure_rate = 0.0
+        self.assertEqual(provider.breaker.state, provider.breaker.HALF_OPEN)
+        return provider
+
+    def test_closed_trial_stream_frees_the_trial(self):
+        provider = self.half_open()
+        chunks = provider.stream("question")
+        self.assertTrue(next(chunks))
+        chunks.close()
+        self.assertTrue(provider.generate("question"))
+
+        provider = self.half_open()
+        chunks = provider.astream("question")
+        self.assertTrue(asyncio.run(chunks.__anext__()))
+        asyncio.run(chunks.aclose())
+        self.assertTrue(provider.generate("question"))
+
+    def test_cancelled_trial_frees_the_trial(self):
+        provider = self.half_open()
+        provider.latency = 1.0
+
+        async def cancel():
+            task = asyncio.ensure_future(provider.agenerate("question"))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel())
+        provider.latency = 0.0
+        self.assertTrue(provider.generate("question"))
+
+    def test_no_api_key_means_no_model(self):
+        self.assertIsNone(build_provider({'BACKEND': 'gemini', 'API_KEY': None}))
+
+    def test_deadline(self):
+        provider = FakeProvider(latency=1.0)
+        with self.assertRaises(LLMError):
+            provider.generate("question", timeout=0.01)
+
+    @override_settings(LLM_PROVIDER=dict(FAKE_LLM, FAILURE_RATE=1.0))
+    def test_tutor_falls_back(self):
+        tutor_answer_cache.reset()
+        activity_recorder.reset()
+        user = User.objects.create_user(username='student', password='password')
+        client = APIClient()
+        client.force_authenticate(user)
+        for _ in range(3):
+            response = client.post('/api/ask-ai-tutor/', {'question': 'What is a loop?'}, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json()['answer'])
+        # The third request never reached the provider
+        self.assertEqual(get_provider().calls, 2)
+
+
+class TutorAnswerCacheTests(TestCase):
+    """Near-duplicate tutor questions are answered from the cache"""
+
+    def test_near_duplicates_hit(self):
+        answers = TutorAnswerCache(threshold=0.6)
+        answers.set("Can you explain a Python decorator?", "A function wrapping a function")
+        self.assertEqual(answers.get("explain python decorators"), "A function wrapping a function")
+        self.assertEqual(answers.get("Please explain decorators in Python"), "A function wrapping a function")
+        self.assertIsNone(answers.get("Can you explain recursion?"))
+        stats = answers.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+        self.assertEqual(stats['top_questions'], [{'question': "Can you explain a Python decorator?", 'hits': 2}])
+
+    def test_question_words_are_kept(self):
+        answers = TutorAnswerCache()
+        answers.set("Why use recursion?", "It mirrors recursive data")
+        self.assertEqual(answers.get("why would you use recursion"), "It mirrors recursive data")
+        self.assertIsNone(answers.get("How to use recursion?"))
+        self.assertIsNone(answers.get("When to use recursion?"))
+
+    def test_lru_eviction(self):
+        answers = TutorAnswerCache(max_entries=2)
+        answers.set("explain recursion", "1")
+        answers.set("explain closures", "2")
+        answers.get("explain recursion")
+        answers.set("explain generators", "3")
+        self.assertEqual(answers.get("explain recursion"), "1")
+        self.assertIsNone(answers.get("explain closures"))
+
+    @override_settings(LLM_PROVIDER=FAKE_LLM)
+    def test_view_skips_model_on_hit(self):
+        reset_provider()
+        tutor_answer_cache.reset()
+        activity_recorder.reset()
+        user = User.objects.create_user(username='student', password='password')
+        client = APIClient()
+        client.force_authenticate(user)
+        first = client.post('/api/ask-ai-tutor/', {'question': 'Explain recursion'}, format='json').json()
+        second = client.post('/api/ask-ai-tutor/', {'question': 'Can you explain recursion?'}, format='json').json()
+        self.assertEqual(first, second)
+        self.assertEqual(get_provider().calls, 1)
+
+
+@override_settings(LLM_PROVIDER=dict(FAKE_LLM, CHUNK_INTERVAL=0.01))
+class TutorStreamTests(TestCase):
+    """The streaming tutor forwards model chunks as Server-Sent Events"""
+
+    def setUp(self):
+        activity_recorder.reset()
+        reset_provider()
+        tutor_answer_cache.reset()
+        self.user = User.objects.create_user(username='student', password='password')
+        self.token = Token.objects.create(user=self.user)
+
+    async def read_events(self, response):
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        return [
+            (frame.split('\n')[0][len('event: '):], json.loads(frame.split('\n')[1][len('data: '):]))
+            for frame in body.strip().split('\n\n')
+        ]
+
+    async def test_streams_chunks(self):
+        response = await self.async_client.get(
+            '/api/ask-ai-tutor/stream/', {'question': 'What is recursion?'},
+            headers={'Authorization': f'Token {self.token.key}'}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = await self.read_events(response)
+        self.assertGreater(len(events), 2)
+        self.assertEqual(events[-1][0], 'done')
+        answer = ''.join(data['text'] for event, data in events if event == 'chunk')
+        self.assertEqual(answer, tutor_answer_cache.get('What is recursion?'))
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get('/api/ask-ai-tutor/stream/', {'question': 'What is recursion?'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_disconnect_closes_model_stream(self):
+        provider = get_provider()
+        events = tutor_event_stream('What is recursion?', provider)
+        self.assertTrue((await events.__anext__()).startswith('event: chunk'))
+        self.assertEqual(provider.open_streams, 1)
+        # What the ASGI handler does when the client goes away
+        await events.aclose()
+        self.assertEqual(provider.open_streams, 0)
+        self.assertIsNone(tutor_answer_cache.get('What is recursion?'))
+
+
+@override_settings(LLM_PROVIDER=dict(FAKE_LLM, LATENCY=0.05))
+class AsyncViewTests(TestCase):
+    """The async tutor and generation endpoints match their DRF counterparts"""
+
+    def setUp(self):
+        activity_recorder.reset()
+        reset_provider()
+        caches['generation'].clear()
+        tutor_answer_cache.reset()
+        self.user = User.objects.create_user(username='student', password='password')
+        self.headers = {'Authorization': f'Token {Token.objects.create(user=self.user).key}'}
+        self.payload = {
+            'target_date': (timezone.now().date() + timedelta(weeks=4)).isoformat(),
+            'study_hours': 5,
+            'selected_skills': ['Python'],
+        }
+
+    def session_client(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        return client
+
+    def test_session_post_requires_csrf_token(self):
+        client = self.session_client()
+        response = client.post('/api/ask-ai-tutor/async/', {'question': 'What is recursion?'}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('CSRF', response.json()['detail'])
+
+        client.cookies['csrftoken'] = 'a' * 32
+        response = client.post(
+            '/api/ask-ai-tutor/async/', {'question': 'What is recursion?'},
+            content_type='application/json', headers={'X-CSRFToken': 'a' * 32}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_cross_site_generation_is_rejected(self):
+        response = self.session_client().post(
+            '/api/generate-learning-path/async/?async=1', self.payload, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(GenerationJob.objects.exists())
+        self.assertFalse(LearningPath.objects.exists())
+
+    async def test_concurrent_tutor_calls_overlap(self):
+        started = time.monotonic()
+        responses = await asyncio.gather(*[
+            self.async_client.post(
+                '/api/ask-ai-tutor/async/', {'question': f'Explain topic {i}'},
+                content_type='application/json', headers=self.headers
+            )
+            for i in range(20)
+        ])
+        self.assertTrue(all(response.status_code == 200 for response in responses))
+        # 20 calls of 50ms each, waited for together
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    async def test_generate_learning_path(self):
+        response = await self.async_client.post(
+            '/api/generate-learning-path/async/', self.payload,
+            content_type='application/json', headers=self.headers
+        )
+        self.assertEqual(response.status_code, 201)
+        path = await LearningPath.objects.aget(pk=response.json()['id'])
+        expected = await sync_to_async(lambda: LearningPathSerializer(LearningPath.objects.with_tree().get(pk=path.pk)).data)()
+        self.assertEqual(response.json(), json.loads(json.dumps(expected)))
+
+    async def test_queued_generation(self):
+        response = await self.async_client.post(
+            '/api/generate-learning-path/async/?async=1', self.payload,
+            content_type='application/json', headers=self.headers
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(await GenerationJob.objects.filter(pk=response.json()['job_id'], user=self.user).aexists())
+
+    async def test_requires_token(self):
+        response = await self.async_client.post('/api/ask-ai-tutor/async/', {'question': 'Hi'}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+
+class PathStreamParserTests(TestCase):
+    """The streaming parser yields complete objects and survives broken tails"""
+
+    ANSWER = (
+        'Here is your path:\n```json\n{"path_title": "Line one\nline two", "journeys": ['
+        '{"journey_title": "J1", "topics": [{"topic_title": "T {1}"}, {"topic_title": "T \\"2\\""}]},'
+        '{"journey_title": "J2", "topics": [{"topic_title": "T3"}]}'
+        ']}\n```'
+    )
+
+    def test_events_in_any_chunking(self):
+        for size in (1, 7, len(self.ANSWER)):
+            parser = PathStreamParser()
+            events = []
+            for start in range(0, len(self.ANSWER), size):
+                events.extend(parser.feed(self.ANSWER[start:start + size]))
+            self.assertTrue(parser.complete)
+            self.assertEqual([event[0] for event in events], ['field', 'topic', 'topic', 'journey', 'topic', 'journey'])
+            # Raw newlines inside strings are kept, not flattened
+            self.assertEqual(events[0], ('field', 'path_title', 'Line one\nline two'))
+            self.assertEqual(events[2], ('topic', 0, 1, {'topic_title': 'T "2"'}))
+            self.assertEqual(events[4], ('topic', 1, 0, {'topic_title': 'T3'}))
+
+    def test_truncated_tail_keeps_complete_journeys(self):
+        truncated = self.ANSWER[:self.ANSWER.index('"J2"') + 20]
+        data = parse_path_stream([truncated])
+        self.assertEqual([journey['journey_title'] for journey in data['journeys']], ['J1'])
+        with self.assertRaises(ValueError):
+            parse_path_stream(['{"path_title": "Nothing else'])
+
+    def test_stream_materializes_partial_path(self):
+        user = User.objects.create_user(username='student', password='password')
+        provider = FakeProvider(chunk_words=3)
+        answer = json.dumps(provider.learning_path())
+        provider._answer = lambda prompt: answer[:answer.index('Fake journey 2') + 40]
+        path = stream_learning_path(user, provider, ['Python'], 5, 4)
+        self.assertEqual(path.title, "Fake path")
+        journey = path.journeys.get()
+        self.assertEqual((journey.title, journey.total_lessons), ("Fake journey 1", 3))
+        self.assertEqual(PathRanking.objects.get(pk=path.pk).enrollments, 1)
+
+
+    @override_settings(LLM_PROVIDER=FAKE_LLM)
+    def test_unstorable_first_journey_falls_back(self):
+        reset_provider()
+        caches['generation'].clear()
+        user = User.objects.create_user(username='student', password='password')
+        answer = FakeProvider().learning_path()
+        answer['journeys'][0]['topics'][0]['quizzes'][0]['questions_count'] = 'ten'
+        get_provider()._answer = lambda prompt: json.dumps(answer)
+        path = generate_learning_path(user, timezone.now().date() + timedelta(weeks=4), 5, ['Python'])
+        self.assertEqual(path.title, 'Learning Path for Python')
+        self.assertEqual(LearningPath.objects.get().pk, path.pk)
+        self.assertTrue(path.journeys.exists())
+
+    def test_tree_read_between_batches_is_not_stale(self):
+        user = User.objects.create_user(username='student', password='password')
+        journey = {
+            'title': 'Journey', 'description': '',
+            'topics': [{'title': 'Topic', 'description': '', 'duration': '1 hour', 'quizzes': []}],
+        }
+        path = LearningPath.objects.create(title="Streaming", description="", duration="4 weeks")
+        add_journeys(path, user, [journey])
+        self.assertEqual(len(user_tree('path', path.pk, user)['journeys']), 1)
+        add_journeys(path, user, [journey])
+        self.assertEqual(len(user_tree('path', path.pk, user)['journeys']), 2)
+
+
+class SkillTemplateTests(TestCase):
+    """Fallback journeys are picked by key or synonym, including database templates"""
+
+    def setUp(self):
+        skill_template_registry.invalidate()
+
+    def test_builtin_matching(self):
+        journey = skill_template_registry.journey_for
+        self.assertIs(journey("Advanced Python"), BUILTIN_TEMPLATES["python"])
+        self.assertIs(journey("Intro to Machine  Learning"), BUILTIN_TEMPLATES["machine learning"])
+        self.assertIs(journey("ML basics"), BUILTIN_TEMPLATES["machine learning"])
+        self.assertIs(journey("Frontend"), BUILTIN_TEMPLATES["web development"])
+        # Whole words only, and the first listed template wins
+        self.assertIs(journey("Email marketing"), DEFAULT_JOURNEY)
+        self.assertIs(journey("Machine learning with Python"), BUILTIN_TEMPLATES["python"])
+
+    def test_database_template(self):
+        journey = dict(DEFAULT_JOURNEY, title="Rust Journey")
+        SkillTemplate.objects.create(key="rust", synonyms=["rustlang"], journey=journey)
+        self.assertEqual(skill_template_registry.journey_for("Rustlang in depth")["title"], "Rust Journey")
+        SkillTemplate.objects.filter(key="rust").delete()
+        skill_template_registry.invalidate()
+        self.assertIs(skill_template_registry.journey_for("Rust"), DEFAULT_JOURNEY)
+
+    def test_many_patterns(self):
+        matcher = SkillMatcher([(f"skill {i}", i) for i in range(5000)] + [("skill", 9999)])
+        self.assertEqual(matcher.match("Learn Skill 4321 today"), 4321)
+        self.assertEqual(matcher.match("skill 43210"), 9999)
+        self.assertIsNone(matcher.match("skills"))
+
+
+class RegistrationTests(TestCase):
+    """Signing up creates one profile of the requested type and a token"""
+
+    def setUp(self):
+        activity_recorder.reset()
+
+    def test_register(self):
+        response = APIClient().post('/api/auth/register/', {
+            'username': 'newstudent', 'email': 'new@example.com', 'first_name': 'New', 'last_name': 'Student',
+            'password': 'Strong-pass-1', 'password2': 'Strong-pass-1', 'user_type': 'teacher',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['user']['user_type'], 'teacher')
+        user = User.objects.get(username='newstudent')
+        self.assertEqual(user.profile.user_type, 'teacher')
+        self.assertEqual(response.data['token'], Token.objects.get(user=user).key)
+
+
+class EndpointBenchmarkTests(TestCase):
+    """benchmark_endpoints covers every endpoint and flags regressions against a baseline"""
+
+    def test_every_endpoint_runs(self):
+        output = tempfile.NamedTemporaryFile(suffix='.json')
+        self.addCleanup(output.close)
+        call_command(
+            'benchmark_endpoints', '--in-place', '--users', '3', '--active-users', '2', '--requests', '0',
+            '--min-samples', '1', '--warmup', '0', '--alloc-samples', '1', '--output', output.name, stdout=mock.Mock()
+        )
+        with open(output.name) as f:
+            results = json.load(f)
+        self.assertEqual(set(results['endpoints']), {pattern.name for pattern in api_urls.urlpatterns})
+        for name, row in results['endpoints'].items():
+            self.assertEqual((row['requests'], row['errors']), (1, 0), name)
+        self.assertEqual(compare(results, results), [])
+
+    def test_compare(self):
+        row = {'p95_ms': 10.0, 'queries': 3.0, 'alloc_kb': 100.0, 'errors': 0}
+        baseline = {'endpoints': {'a': row, 'b': row, 'c': row}}
+        results = {'endpoints': {
+            'a': dict(row, p95_ms=12.0, queries=3.5),
+            'b': dict(row, p95_ms=20.0, queries=4.0, alloc_kb=200.0),
+            'c': dict(row, errors=1),
+            'new': row,
+        }}
+        regressions = compare(results, baseline, tolerance=0.25, min_delta_ms=1.0)
+        self.assertEqual([regression.split(':')[0] for regression in regressions], ['b', 'b', 'b', 'c'])
@@ -0,0 +1,165 @@
+"""
+Plain-dict rendering of learning path and journey trees.
+
+Produces the same output as LearningPathSerializer and LearningJourneySerializer
+from one ``.values()`` query per level, grouped in Python, without going through
+the DRF field machinery for every journey, topic and quiz.
+
+Rendered trees are cached under their path's ``tree_version``, which signals
+bump whenever a journey, topic or quiz of the path changes. The shared content
+tree is rendered once; an enrolled user's progress is overlaid on a copy that
+is cached under their enrollment's ``progress_version`` as well. Stale entries
+are never read again and age out of the cache.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from django.utils.cache import quote_etag
+
+from .models import LearningPath, LearningJourney, Topic, Quiz, Enrollment
+from .progress import NO_PROGRESS, UserProgress
+from .serializers import QuizSerializer, TopicSerializer, LearningJourneySerializer, LearningPathSerializer
+
+
+def _columns(serializer_class):
+    declared = serializer_class._declared_fields
+    return [field for field in serializer_class.Meta.fields if field not in declared]
+
+# Column lists follow the serializers so both renderings stay in sync. Declared
+# fields are nested trees or per-user progress, filled in by apply_progress().
+QUIZ_FIELDS = _columns(QuizSerializer)
+TOPIC_FIELDS = _columns(TopicSerializer)
+JOURNEY_FIELDS = _columns(LearningJourneySerializer)
+PATH_FIELDS = _columns(LearningPathSerializer)
+
+
+def _group(rows, key):
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row.pop(key)].append(row)
+    return groups
+
+
+def _attach_topics(journeys, **lookup):
+    """Attach ordered topics and quizzes to journey rows matched by ``lookup`` on Topic"""
+    quizzes = _group(
+        Quiz.objects.filter(**{f'topic__{key}': value for key, value in lookup.items()})
+        .order_by('id').values(*QUIZ_FIELDS, 'topic_id'),
+        'topic_id'
+    )
+    topics = Topic.objects.filter(**lookup).order_by('order', 'id').values(*TOPIC_FIELDS, 'learning_journey_id')
+    for topic in topics:
+        topic['is_completed'] = False
+        topic['quizzes'] = quizzes.get(topic['id'], [])
+    topics_by_journey = _group(topics, 'learning_journey_id')
+    for journey in journeys:
+        journey.update(dict.fromkeys(UserProgress.JOURNEY_FIELDS))
+        journey['topics'] = topics_by_journey.get(journey['id'], [])
+    return journeys
+
+
+def apply_progress(journeys, progress):
+    """Fill in a user's progress on rendered journeys, in place"""
+    for journey in journeys:
+        for topic in journey['topics']:
+            topic['is_completed'] = topic['id'] in progress.topic_ids
+            for quiz in topic['quizzes']:
+                quiz['is_completed'] = quiz['id'] in progress.quiz_ids
+        topics = [(topic['id'], topic['title']) for topic in journey['topics']]
+        journey.update(progress.journey(journey['total_lessons'], topics))
+    return journeys
+
+
+def render_learning_path(pk):
+    """Render a learning path tree. Raises LearningPath.DoesNotExist."""
+    path = LearningPath.objects.filter(pk=pk).values(*PATH_FIELDS).first()
+    if path is None:
+        raise LearningPath.DoesNotExist
+    journeys = list(LearningJourney.objects.filter(learning_path_id=pk).order_by('id').values(*JOURNEY_FIELDS))
+    path['journeys'] = apply_progress(_attach_topics(journeys, learning_journey__learning_path_id=pk), NO_PROGRESS)
+    return path
+
+
+def render_learning_journey(pk):
+    """Render a learning journey tree. Raises LearningJourney.DoesNotExist."""
+    journey = LearningJourney.objects.filter(pk=pk).values(*JOURNEY_FIELDS).first()
+    if journey is None:
+        raise LearningJourney.DoesNotExist
+    return apply_progress(_attach_topics([journey], learning_journey_id=pk), NO_PROGRESS)[0]
+
+
+TREE_RENDERERS = {
+    'path': render_learning_path,
+    'journey': render_learning_journey,
+}
+
+
+def tree_version(kind, pk, user=None):
+    """
+    Current version of a path or journey tree as seen by ``user``, or None if
+    it does not exist. The version is a ``(tree_version, enrollment)`` pair,
+    where ``enrollment`` is the user's ``(id, progress_version)`` on the path,
+    or None if they are not enrolled.
+    """
+    if kind == 'path':
+        trees = LearningPath.objects.filter(pk=pk)
+        enrollments = Enrollment.objects.filter(learning_path=OuterRef('pk'))
+        version_field = 'tree_version'
+    else:
+        trees = LearningJourney.objects.filter(pk=pk)
+        enrollments = Enrollment.objects.filter(learning_path=OuterRef('learning_path_id'))
+        version_field = 'learning_path__tree_version'
+    enrollments = enrollments.filter(user=getattr(user, 'pk', None))
+    row = trees.annotate(
+        enrollment_id=Subquery(enrollments.values('id')[:1]),
+        progress_version=Subquery(enrollments.values('progress_version')[:1]),
+    ).values_list(version_field, 'enrollment_id', 'progress_version').first()
+    if row is None:
+        return None
+    version, enrollment_id, progress_version = row
+    return version, (enrollment_id, progress_version) if enrollment_id is not None else None
+
+
+def _version_tag(version):
+    tree_version, enrollment = version
+    if enrollment is None:
+        return f'v{tree_version}'
+    return f'v{tree_version}-e{enrollment[0]}.{enrollment[1]}'
+
+
+def tree_etag(kind, pk, version, format):
+    """Strong ETag for one version of a tree in one response format"""
+    return quote_etag(f'{kind}-{pk}-{_version_tag(version)}-{format}')
+
+
+def cached_tree(kind, pk, version, user=None):
+    """
+    Render a tree with ``user``'s progress, reusing the cached copies for this
+    version when there are some
+    """
+    timeout = getattr(settings, 'TREE_CACHE_TIMEOUT', 3600)
+    key = f'tree:{kind}:{pk}:{_version_tag(version)}'
+    tree = cache.get(key)
+    if tree is not None:
+        return tree
+
+    content_key = f'tree:{kind}:{pk}:v{version[0]}'
+    tree = cache.get(content_key) if key != content_key else None
+    if tree is None:
+        tree = TREE_RENDERERS[kind](pk)
+        cache.set(content_key, tree, timeout)
+    if key != content_key:
+        lookup = {'learning_journey__learning_path_id': pk} if kind == 'path' else {'learning_journey_id': pk}
+        apply_progress(tree['journeys'] if kind == 'path' else [tree], UserProgress.load(user, **lookup))
+        cache.set(key, tree, timeout)
+    return tree
+
+
+def user_tree(kind, pk, user):
+    """Render a path or journey tree with ``user``'s progress. Raises DoesNotExist."""
+    version = tree_version(kind, pk, user)
+    if version is None:
+        raise (LearningPath if kind == 'path' else LearningJourney).DoesNotExist
+    return cached_tree(kind, pk, version, user)
@@ -0,0 +1,74 @@
+"""
+AI tutor prompts, fallback answers and the Server-Sent Events stream used by
+the streaming tutor endpoint.
+
+The stream sends ``chunk`` events with ``{"text": ...}`` as the model
+produces output and a final ``done`` event. Cached answers arrive as a single
+chunk; when the model fails, the rest of the answer is replaced by a fallback
+response so clients always get a complete reply.
+"""
+import json
+import random
+
+from .llm import LLMError
+from .tutor_cache import tutor_answer_cache
+
+FALLBACK_RESPONSES = [
+    "I understand your question about this topic. The key concept to understand is that it involves multiple interconnected principles. First, consider the fundamental elements, then how they relate to each other. Does that help clarify things?",
+    "That's an excellent question! This topic is fascinating because it combines theoretical concepts with practical applications. Think about how the underlying principles apply in different contexts. Would you like me to elaborate on any specific aspect?",
+    "Your question touches on an important area of study. The main thing to remember is that this concept builds on foundational knowledge while introducing new perspectives. Try approaching it from different angles to gain a deeper understanding.",
+    "I'd be happy to help with this. The concept you're asking about can be understood through a step-by-step approach. Start with the basic definition, then explore how it applies in various scenarios. Does that give you a better understanding?",
+    "This is a common question many students have. The key insight is to recognize the patterns and relationships within the topic. Once you see how the different elements connect, the concept becomes much clearer."
+]
+
+
+def tutor_prompt(question):
+    # Create a prompt for the tutor model
+    return f"""
+    You are an AI tutor for the EduSmart learning platform. Answer the following question from a student:
+    
+    Question: {question}
+    
+    Provide a helpful, educational response that explains the concept clearly. 
+    Keep your answer concise but informative, and use examples where appropriate.
+    """
+
+
+def fallback_answer():
+    return random.choice(FALLBACK_RESPONSES)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def tutor_event_stream(question, provider):
+    """Yield SSE frames answering ``question``. Closing it early closes the model stream."""
+    answer = tutor_answer_cache.get(question)
+    if answer is not None:
+        yield sse_event('chunk', {'text': answer})
+        yield sse_event('done', {'cached': True})
+        return
+
+    if provider is None:
+        yield sse_event('chunk', {'text': fallback_answer()})
+        yield sse_event('done', {'fallback': True})
+        return
+
+    parts = []
+    stream = provider.astream(tutor_prompt(question))
+    try:
+        async for text in stream:
+            parts.append(text)
+            yield sse_event('chunk', {'text': text})
+    except LLMError as e:
+        print(f"Error streaming AI tutor answer: {str(e)}")
+        if not parts:
+            yield sse_event('chunk', {'text': fallback_answer()})
+        yield sse_event('done', {'fallback': True})
+        return
+    finally:
+        await stream.aclose()
+
+    tutor_answer_cache.set(question, ''.join(parts))
+    yield sse_event('done', {})
@@ -0,0 +1,155 @@
+"""
+Near-duplicate answer cache for the AI tutor.
+
+Questions are normalized to a set of content words (lowercased, punctuation
+and filler words dropped, plural "s" trimmed), so "Can you explain a Python
+decorator?" and "explain python decorators" end up as the same set. Question
+words such as "why" and "how" are kept: they change what is being asked. Cached
+questions are indexed by MinHash signatures split into LSH bands; a lookup
+only compares the exact Jaccard similarity against the questions that share
+a band, and answers when the best one reaches ``threshold``.
+
+The cache lives in process memory, is bounded to ``max_entries`` with LRU
+eviction and counts hits per cached question.
+"""
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+
+STOP_WORDS = frozenset("""
+a an and are as at be by can could do does explain for from i in is it me of
+on or please should tell the this to with would you your
+""".split())
+
+WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def question_terms(question):
+    """Normalized set of content words of a question"""
+    terms = set()
+    for word in WORD_RE.findall(question.lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.add(word)
+    return frozenset(terms)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+class CachedAnswer:
+    __slots__ = ('question', 'terms', 'bands', 'answer', 'hits')
+
+    def __init__(self, question, terms, bands, answer):
+        self.question = question
+        self.terms = terms
+        self.bands = bands
+        self.answer = answer
+        self.hits = 0
+
+
+class TutorAnswerCache:
+    def __init__(self, max_entries=1000, threshold=0.8, bands=8, rows=4):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop every cached answer and counter"""
+        with self._lock:
+            self._entries = OrderedDict()
+            self._buckets = {}
+            self.hits = 0
+            self.misses = 0
+
+    def _band_keys(self, terms):
+        signature = [
+            min(zlib.crc32(f'{seed}:{term}'.encode()) for term in terms)
+            for seed in range(self.bands * self.rows)
+        ]
+        return [
+            (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def get(self, question):
+        """Cached answer for ``question`` or a near-duplicate of it, or None"""
+        terms = question_terms(question)
+        if not terms:
+            return None
+        bands = self._band_keys(terms)
+        with self._lock:
+            best, best_score = None, 0.0
+            entry = self._entries.get(terms)
+            if entry is not None:
+                best, best_score = entry, 1.0
+            else:
+                candidates = set()
+                for key in bands:
+                    candidates.update(self._buckets.get(key, ()))
+                for candidate in candidates:
+                    score = jaccard(terms, candidate)
+                    if score > best_score:
+                        best, best_score = self._entries[candidate], score
+
+            if best is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best.terms)
+            best.hits += 1
+            self.hits += 1
+            return best.answer
+
+    def set(self, question, answer):
+        """Cache ``answer`` for ``question``, evicting the least recently used entries"""
+        terms = question_terms(question)
+        if not terms:
+            return
+        bands = self._band_keys(terms)
+        with self._lock:
+            entry = self._entries.get(terms)
+            if entry is not None:
+                entry.answer = answer
+                self._entries.move_to_end(terms)
+                return
+            self._entries[terms] = CachedAnswer(question, terms, bands, answer)
+            for key in bands:
+                self._buckets.setdefault(key, set()).add(terms)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                for key in evicted.bands:
+                    bucket = self._buckets[key]
+                    bucket.discard(evicted.terms)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def stats(self, top=10):
+        """Counters and the most frequently served questions"""
+        with self._lock:
+            popular = sorted(self._entries.values(), key=lambda entry: entry.hits, reverse=True)[:top]
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'top_questions': [
+                    {'question': entry.question, 'hits': entry.hits}
+                    for entry in popular if entry.hits
+                ],
+            }
+
+
+tutor_answer_cache = TutorAnswerCache(
+    max_entries=getattr(settings, 'TUTOR_CACHE_MAX_ENTRIES', 1000),
+    threshold=getattr(settings, 'TUTOR_CACHE_THRESHOLD', 0.8),
+)
@@ -3,18 +3,26 @@ from .views import (
     predict,
     LearningPathList,
     LearningPathDetail,
+    LearningPathEnrollView,
     LearningJourneyDetail,
     TopLearningPaths,
     GenerateLearningPath,
+    GenerationJobDetail,
+    GenerationCacheStatsView,
     RegisterView,
     LoginView,
     LogoutView,
     UserDetailView,
     TopicUpdateView,
+    TopicBulkUpdateView,
     UserStatsView,
     QuizPerformanceView,
     LearningInsightsView,
     AskAITutorView,
+    TutorCacheStatsView,
+    ask_ai_tutor_stream,
+    ask_ai_tutor_async,
+    generate_learning_path_async,
     RecommendationsView,
     SaveQuizResultView
 )
@@ -23,14 +31,22 @@ urlpatterns = [
     path('predict/', predict, name='predict'),
     path('learning-paths/', LearningPathList.as_view(), name='learning-path-list'),
     path('learning-paths/<int:pk>/', LearningPathDetail.as_view(), name='learning-path-detail'),
+    path('learning-paths/<int:pk>/enroll/', LearningPathEnrollView.as_view(), name='learning-path-enroll'),
     path('learning-journeys/<int:pk>/', LearningJourneyDetail.as_view(), name='learning-journey-detail'),
     path('top-learning-paths/', TopLearningPaths.as_view(), name='top-learning-paths'),
     path('generate-learning-path/', GenerateLearningPath.as_view(), name='generate-learning-path'),
+    path('generate-learning-path/async/', generate_learning_path_async, name='generate-learning-path-async'),
+    path('generation-jobs/<int:pk>/', GenerationJobDetail.as_view(), name='generation-job-detail'),
+    path('generation-cache/stats/', GenerationCacheStatsView.as_view(), name='generation-cache-stats'),
+    path('topics/bulk-update/', TopicBulkUpdateView.as_view(), name='topic-bulk-update'),
     path('topics/<int:pk>/', TopicUpdateView.as_view(), name='topic-update'),
     path('user-stats/', UserStatsView.as_view(), name='user-stats'),
     path('quiz-performance/', QuizPerformanceView.as_view(), name='quiz-performance'),
     path('learning-insights/', LearningInsightsView.as_view(), name='learning-insights'),
     path('ask-ai-tutor/', AskAITutorView.as_view(), name='ask-ai-tutor'),
+    path('ask-ai-tutor/async/', ask_ai_tutor_async, name='ask-ai-tutor-async'),
+    path('ask-ai-tutor/stream/', ask_ai_tutor_stream, name='ask-ai-tutor-stream'),
+    path('ask-ai-tutor/cache-stats/', TutorCacheStatsView.as_view(), name='tutor-cache-stats'),
     path('recommendations/', RecommendationsView.as_view(), name='recommendations'),
     path('save-quiz-result/', SaveQuizResultView.as_view(), name='save-quiz-result'),
     
@@ -132,6 +132,12 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Response headers the frontend may read (pagination cursors and tree ETags)
+CORS_EXPOSE_HEADERS = [
+    'etag',
+    'link',
+]
+
 # CORS allowed methods
 CORS_ALLOW_METHODS = [
     'DELETE',
@@ -141,3 +147,63 @@ CORS_ALLOW_METHODS = [
     'POST',
     'PUT',
 ]
+
+# User activity recording
+# Repeat activity calls for the same user and day are skipped in-process.
+# Set ACTIVITY_BUFFER_SIZE above 0 to also batch new activity rows into bulk inserts.
+ACTIVITY_BUFFER_SIZE = 0
+ACTIVITY_FLUSH_INTERVAL = 5  # Seconds before a partially filled buffer is flushed
+
+# Cache
+# LocMemCache evicts least recently used entries once MAX_ENTRIES is reached
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'edusmart',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            'CULL_FREQUENCY': 10,  # Evict the oldest tenth when full
+        },
+    },
+    # Parsed Gemini answers for learning path generation, see api.generation
+    'generation': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'edusmart-generation',
+        'TIMEOUT': 24 * 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 500,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+TREE_CACHE_TIMEOUT = 60 * 60  # Seconds a rendered path/journey tree stays cached
+
+# Learning path popularity ranking
+RANKING_HALF_LIFE_DAYS = 30  # Quiz results lose half their ranking weight every 30 days
+TOP_PATHS_CACHE_TIMEOUT = 60  # Seconds the top paths list is served from cache
+
+# Queue GenerateLearningPath requests for the run_generation_worker command by default
+GENERATE_PATHS_ASYNC = False
+# Requests whose study hours fall in the same bucket share cached generation results
+GENERATION_HOURS_BUCKET = 5
+
+# Model used by path generation and the AI tutor, see api.llm
+LLM_PROVIDER = {
+    'BACKEND': os.environ.get('LLM_BACKEND', 'gemini'),
+    'API_KEY': os.environ.get('GEMINI_API_KEY'),  # Unset: no model, template answers only
+    'MODEL': 'gemini-1.5-flash',
+    'TIMEOUT': 20,  # Seconds per model call
+    'FAILURE_THRESHOLD': 5,  # Consecutive failures before the circuit opens
+    'RESET_TIMEOUT': 30,  # Seconds before a trial call is let through again
+    # Only used by the offline 'fake' backend
+    'LATENCY': float(os.environ.get('LLM_FAKE_LATENCY', 0)),
+    'FAILURE_RATE': float(os.environ.get('LLM_FAKE_FAILURE_RATE', 0)),
+    'CHUNK_INTERVAL': float(os.environ.get('LLM_FAKE_CHUNK_INTERVAL', 0)),
+}
+
+# AI tutor answers reused for near-duplicate questions, see api.tutor_cache
+TUTOR_CACHE_MAX_ENTRIES = 1000
+TUTOR_CACHE_THRESHOLD = 0.8  # Minimum Jaccard similarity of the questions' content words
+
+# Seconds before the fallback skill-template registry reloads database templates
+SKILL_TEMPLATE_RELOAD_INTERVAL = 300